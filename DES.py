@@ -33,9 +33,179 @@
                 |
     经 DES 加密后的 64 位密文
 """
-from RSA import string2bin, bin2string
+import os
+import struct
+import threading
+from collections import OrderedDict
+
+# 初始置换表（IP）
+IP_TABLE = [58, 50, 42, 34, 26, 18, 10, 2,
+            60, 52, 44, 36, 28, 20, 12, 4,
+            62, 54, 46, 38, 30, 22, 14, 6,
+            64, 56, 48, 40, 32, 24, 16, 8,
+            57, 49, 41, 33, 25, 17, 9, 1,
+            59, 51, 43, 35, 27, 19, 11, 3,
+            61, 53, 45, 37, 29, 21, 13, 5,
+            63, 55, 47, 39, 31, 23, 15, 7]
+
+# 密钥置换表（PC-1）
+PC1_TABLE = [57, 49, 41, 33, 25, 17, 9,
+             1, 58, 50, 42, 34, 26, 18,
+             10, 2, 59, 51, 43, 35, 27,
+             19, 11, 3, 60, 52, 44, 36,
+             63, 55, 47, 39, 31, 23, 15,
+             7, 62, 54, 46, 38, 30, 22,
+             14, 6, 61, 53, 45, 37, 29,
+             21, 13, 5, 28, 20, 12, 4]
+
+# 每轮迭代的循环左移位数
+ROTATE_TABLE = [1, 1, 2, 2, 2, 2, 2, 2,
+                1, 2, 2, 2, 2, 2, 2, 1]
+
+# 压缩置换表（PC-2）
+PC2_TABLE = [14, 17, 11, 24, 1, 5,
+             3, 28, 15, 6, 21, 10,
+             23, 19, 12, 4, 26, 8,
+             16, 7, 27, 20, 13, 2,
+             41, 52, 31, 37, 47, 55,
+             30, 40, 51, 45, 33, 48,
+             44, 49, 39, 56, 34, 53,
+             46, 42, 50, 36, 29, 32]
+
+# 扩展置换表（E 盒）
+E_TABLE = [2, 1, 2, 3, 4, 5,
+           4, 5, 6, 7, 8, 9,
+           8, 9, 10, 11, 12, 13,
+           12, 13, 14, 15, 16, 17,
+           16, 17, 18, 19, 20, 21,
+           20, 21, 22, 23, 24, 25,
+           24, 25, 26, 27, 28, 29,
+           28, 29, 30, 31, 32, 1]
+
+# S 盒
+SBOX1 = [14, 4, 13, 1, 2, 15, 11, 8, 3, 10, 6, 12, 5, 9, 0, 7,
+         0, 15, 7, 4, 14, 2, 13, 1, 10, 6, 12, 11, 9, 5, 3, 8,
+         4, 1, 14, 8, 13, 6, 2, 11, 15, 12, 9, 7, 3, 10, 5, 0,
+         15, 12, 8, 2, 4, 9, 1, 7, 5, 11, 3, 14, 10, 0, 6, 13]
+SBOX2 = [15, 1, 8, 14, 6, 11, 3, 4, 9, 7, 2, 13, 12, 0, 5, 10,
+         3, 13, 4, 7, 15, 2, 8, 14, 12, 0, 1, 10, 6, 9, 11, 5,
+         0, 14, 7, 11, 10, 4, 13, 1, 5, 8, 12, 6, 9, 3, 2, 15,
+         13, 8, 10, 1, 3, 15, 4, 2, 11, 6, 7, 12, 0, 5, 14, 9]
+SBOX3 = [10, 0, 9, 14, 6, 3, 15, 5, 1, 13, 12, 7, 11, 4, 2, 8,
+         13, 7, 0, 9, 3, 4, 6, 10, 2, 8, 5, 14, 12, 11, 15, 1,
+         13, 6, 4, 9, 8, 15, 3, 0, 11, 1, 2, 12, 5, 10, 14, 7,
+         1, 10, 13, 0, 6, 9, 8, 7, 4, 15, 14, 3, 11, 5, 2, 12]
+SBOX4 = [7, 13, 14, 3, 0, 6, 9, 10, 1, 2, 8, 5, 11, 12, 4, 15,
+         13, 8, 11, 5, 6, 15, 0, 3, 4, 7, 2, 12, 1, 10, 14, 9,
+         10, 6, 9, 0, 12, 11, 7, 13, 15, 1, 3, 14, 5, 2, 8, 4,
+         3, 15, 0, 6, 10, 1, 13, 8, 9, 4, 5, 11, 12, 7, 2, 14]
+SBOX5 = [2, 12, 4, 1, 7, 10, 11, 6, 8, 5, 3, 15, 13, 0, 14, 9,
+         14, 11, 2, 12, 4, 7, 13, 1, 5, 0, 15, 10, 3, 9, 8, 6,
+         4, 2, 1, 11, 10, 13, 7, 8, 15, 9, 12, 5, 6, 3, 0, 14,
+         11, 8, 12, 7, 1, 14, 2, 13, 6, 15, 0, 9, 10, 4, 5, 3]
+SBOX6 = [12, 1, 10, 15, 9, 2, 6, 8, 0, 13, 3, 4, 14, 7, 5, 11,
+         10, 15, 4, 2, 7, 12, 9, 5, 6, 1, 13, 14, 0, 11, 3, 8,
+         9, 14, 15, 5, 2, 8, 12, 3, 7, 0, 4, 10, 1, 13, 11, 6,
+         4, 3, 2, 12, 9, 5, 15, 10, 11, 14, 1, 7, 6, 0, 8, 13]
+SBOX7 = [4, 11, 2, 14, 15, 0, 8, 13, 3, 12, 9, 7, 5, 10, 6, 1,
+         13, 0, 11, 7, 4, 9, 1, 10, 14, 3, 5, 12, 2, 15, 8, 6,
+         1, 4, 11, 13, 12, 3, 7, 14, 10, 15, 6, 8, 0, 5, 9, 2,
+         6, 11, 13, 8, 1, 4, 10, 7, 9, 5, 0, 15, 14, 2, 3, 12]
+SBOX8 = [13, 2, 8, 4, 6, 15, 11, 1, 10, 9, 3, 14, 5, 0, 12, 7,
+         1, 15, 13, 8, 10, 3, 7, 4, 12, 5, 6, 11, 0, 14, 9, 2,
+         7, 11, 4, 1, 9, 12, 14, 2, 0, 6, 10, 13, 15, 3, 5, 8,
+         2, 1, 14, 7, 4, 10, 8, 13, 15, 12, 9, 0, 3, 5, 6, 11]
+SBOXES = [SBOX1, SBOX2, SBOX3, SBOX4, SBOX5, SBOX6, SBOX7, SBOX8]
+
+# P 置换表
+P_TABLE = [16, 7, 20, 21, 29, 12, 28, 17,
+           1, 15, 23, 26, 5, 18, 31, 10,
+           2, 8, 24, 14, 32, 27, 3, 9,
+           19, 13, 30, 6, 22, 11, 4, 25]
+
+# 末置换表（逆 IP）
+FP_TABLE = [40, 8, 48, 16, 56, 24, 64, 32,
+            39, 7, 47, 15, 55, 23, 63, 31,
+            38, 6, 46, 14, 54, 22, 62, 30,
+            37, 5, 45, 13, 53, 21, 61, 29,
+            36, 4, 44, 12, 52, 20, 60, 28,
+            35, 3, 43, 11, 51, 19, 59, 27,
+            34, 2, 42, 10, 50, 18, 58, 26,
+            33, 1, 41, 9, 49, 17, 57, 25]
+
+
+def permute_int(value, table, in_len):
+    """
+    按置换表对整数形式的比特串进行置换（最高位为第 1 位）
+    :param value: 待置换的整数
+    :param table: 置换表，元素为从 1 开始的比特位置
+    :param in_len: 输入的比特长度
+    :return: 置换后的整数，比特长度为 len(table)
+    """
+    re_int = 0
+    for i in table:
+        re_int = (re_int << 1) | ((value >> (in_len - i)) & 1)
+
+    return re_int
+
+
+def compile_displace(table, in_len):
+    """
+    把置换表编译为按字节查表的置换函数：输入的每个字节各查一张 256 项的表，
+    表项是该字节单独置换后的结果，所有表项按位或起来就是整个输入的置换结果
+    :param table: 置换表，元素为从 1 开始的比特位置
+    :param in_len: 输入的比特长度，必须是 8 的整数倍
+    :return: 接收整数、返回置换后整数的函数
+    """
+    if in_len % 8 != 0:
+        raise ValueError("输入比特长度必须是 8 的整数倍")
+    parts = []
+    for shift in range(in_len - 8, -1, -8):
+        parts.append((shift, [permute_int(v << shift, table, in_len) for v in range(256)]))
+    parts = tuple(parts)
+
+    def displace(value):
+        re_int = 0
+        for shift_l, lut in parts:
+            re_int |= lut[(value >> shift_l) & 0xFF]
+        return re_int
+
+    return displace
+
+
+# 各置换表及其输入比特长度
+DISPLACE_TABLES = {
+    "IP": (IP_TABLE, 64),
+    "FP": (FP_TABLE, 64),
+    "PC1": (PC1_TABLE, 64),
+    "PC2": (PC2_TABLE, 56),
+    "E": (E_TABLE, 32),
+    "P": (P_TABLE, 32),
+}
+compiled_displaces = {}
+
+
+def get_displace(name):
+    """
+    获取编译后的置换函数，首次使用时编译，之后所有调用方共用
+    :param name: DISPLACE_TABLES 中的名字
+    :return: 置换函数
+    """
+    try:
+        return compiled_displaces[name]
+    except KeyError:
+        table, in_len = DISPLACE_TABLES[name]
+        return compiled_displaces.setdefault(name, compile_displace(table, in_len))
+
 
-subkeys = None
+def displace_bin(bin_str, name):
+    """
+    对二进制字符串做置换
+    :param bin_str: 二进制字符串
+    :param name: DISPLACE_TABLES 中的名字
+    :return: 置换后的二进制字符串
+    """
+    return format(get_displace(name)(int(bin_str, 2)), "0%db" % len(DISPLACE_TABLES[name][0]))
 
 
 def init_displace(bin_str):
@@ -46,19 +216,7 @@ def init_displace(bin_str):
     """
     if len(bin_str) != 64:
         raise ValueError("二进制字符串长度必须是 64")
-    displace_table = [58, 50, 42, 34, 26, 18, 10, 2,
-                      60, 52, 44, 36, 28, 20, 12, 4,
-                      62, 54, 46, 38, 30, 22, 14, 6,
-                      64, 56, 48, 40, 32, 24, 16, 8,
-                      57, 49, 41, 33, 25, 17, 9, 1,
-                      59, 51, 43, 35, 27, 19, 11, 3,
-                      61, 53, 45, 37, 29, 21, 13, 5,
-                      63, 55, 47, 39, 31, 23, 15, 7]
-    re_bin = ""
-    for i in displace_table:
-        re_bin += bin_str[i - 1]
-
-    return re_bin
+    return displace_bin(bin_str, "IP")
 
 
 def key_displace(key_bin):
@@ -69,20 +227,7 @@ def key_displace(key_bin):
     """
     if len(key_bin) != 64:
         raise ValueError("二进制密钥字符串长度必须是 64")
-    key_table = [57, 49, 41, 33, 25, 17, 9,
-                 1, 58, 50, 42, 34, 26, 18,
-                 10, 2, 59, 51, 43, 35, 27,
-                 19, 11, 3, 60, 52, 44, 36,
-                 63, 55, 47, 39, 31, 23, 15,
-                 7, 62, 54, 46, 38, 30, 22,
-                 14, 6, 61, 53, 45, 37, 29,
-                 21, 13, 5, 28, 20, 12, 4]
-
-    key_bin_56 = ""
-    for i in key_table:
-        key_bin_56 += key_bin[i - 1]
-
-    return key_bin_56
+    return displace_bin(key_bin, "PC1")
 
 
 def get_subkey(key_bin_56, rotate_time):
@@ -94,28 +239,14 @@ def get_subkey(key_bin_56, rotate_time):
     """
     if len(key_bin_56) != 56:
         raise ValueError("二进制密钥字符串长度必须是 56")
-    rotate_table = [1, 1, 2, 2, 2, 2, 2, 2,
-                    1, 2, 2, 2, 2, 2, 2, 1]
-
-    displace_table = [14, 17, 11, 24, 1, 5,
-                      3, 28, 15, 6, 21, 10,
-                      23, 19, 12, 4, 26, 8,
-                      16, 7, 27, 20, 13, 2,
-                      41, 52, 31, 37, 47, 55,
-                      30, 40, 51, 45, 33, 48,
-                      44, 49, 39, 56, 34, 53,
-                      46, 42, 50, 36, 29, 32]
 
     left_key_bin_56 = key_bin_56[:28]
     right_key_bin_56 = key_bin_56[28:]
-    for i in range(rotate_table[rotate_time]):
+    for i in range(ROTATE_TABLE[rotate_time]):
         left_key_bin_56 = left_key_bin_56[28:] + left_key_bin_56[:28]
         right_key_bin_56 = right_key_bin_56[28:] + right_key_bin_56[:28]
 
-    key_bin_48 = ""
-    for i in displace_table:
-        key_bin_48 += key_bin_56[i - 1]
-
+    key_bin_48 = displace_bin(key_bin_56, "PC2")
     return key_bin_56, key_bin_48
 
 
@@ -137,19 +268,7 @@ def extend_displace(bin_str):
     """
     if len(bin_str) != 32:
         raise ValueError("二进制字符串长度必须是 32")
-    displace_table = [2, 1, 2, 3, 4, 5,
-                      4, 5, 6, 7, 8, 9,
-                      8, 9, 10, 11, 12, 13,
-                      12, 13, 14, 15, 16, 17,
-                      16, 17, 18, 19, 20, 21,
-                      20, 21, 22, 23, 24, 25,
-                      24, 25, 26, 27, 28, 29,
-                      28, 29, 30, 31, 32, 1]
-    re_bin = ""
-    for i in displace_table:
-        re_bin += bin_str[i - 1]
-
-    return re_bin
+    return displace_bin(bin_str, "E")
 
 
 def sbox_displace(bin_str):
@@ -160,45 +279,10 @@ def sbox_displace(bin_str):
     """
     if len(bin_str) != 48:
         raise ValueError("二进制字符串长度必须是 48")
-    sbox1 = [14, 4, 13, 1, 2, 15, 11, 8, 3, 10, 6, 12, 5, 9, 0, 7,
-             0, 15, 7, 4, 14, 2, 13, 1, 10, 6, 12, 11, 9, 5, 3, 8,
-             4, 1, 14, 8, 13, 6, 2, 11, 15, 12, 9, 7, 3, 10, 5, 0,
-             15, 12, 8, 2, 4, 9, 1, 7, 5, 11, 3, 14, 10, 0, 6, 13]
-    sbox2 = [15, 1, 8, 14, 6, 11, 3, 4, 9, 7, 2, 13, 12, 0, 5, 10,
-             3, 13, 4, 7, 15, 2, 8, 14, 12, 0, 1, 10, 6, 9, 11, 5,
-             0, 14, 7, 11, 10, 4, 13, 1, 5, 8, 12, 6, 9, 3, 2, 15,
-             13, 8, 10, 1, 3, 15, 4, 2, 11, 6, 7, 12, 0, 5, 14, 9]
-    sbox3 = [10, 0, 9, 14, 6, 3, 15, 5, 1, 13, 12, 7, 11, 4, 2, 8,
-             13, 7, 0, 9, 3, 4, 6, 10, 2, 8, 5, 14, 12, 11, 15, 1,
-             13, 6, 4, 9, 8, 15, 3, 0, 11, 1, 2, 12, 5, 10, 14, 7,
-             1, 10, 13, 0, 6, 9, 8, 7, 4, 15, 14, 3, 11, 5, 2, 12]
-    sbox4 = [7, 13, 14, 3, 0, 6, 9, 10, 1, 2, 8, 5, 11, 12, 4, 15,
-             13, 8, 11, 5, 6, 15, 0, 3, 4, 7, 2, 12, 1, 10, 14, 9,
-             10, 6, 9, 0, 12, 11, 7, 13, 15, 1, 3, 14, 5, 2, 8, 4,
-             3, 15, 0, 6, 10, 1, 13, 8, 9, 4, 5, 11, 12, 7, 2, 14]
-    sbox5 = [2, 12, 4, 1, 7, 10, 11, 6, 8, 5, 3, 15, 13, 0, 14, 9,
-             14, 11, 2, 12, 4, 7, 13, 1, 5, 0, 15, 10, 3, 9, 8, 6,
-             4, 2, 1, 11, 10, 13, 7, 8, 15, 9, 12, 5, 6, 3, 0, 14,
-             11, 8, 12, 7, 1, 14, 2, 13, 6, 15, 0, 9, 10, 4, 5, 3]
-    sbox6 = [12, 1, 10, 15, 9, 2, 6, 8, 0, 13, 3, 4, 14, 7, 5, 11,
-             10, 15, 4, 2, 7, 12, 9, 5, 6, 1, 13, 14, 0, 11, 3, 8,
-             9, 14, 15, 5, 2, 8, 12, 3, 7, 0, 4, 10, 1, 13, 11, 6,
-             4, 3, 2, 12, 9, 5, 15, 10, 11, 14, 1, 7, 6, 0, 8, 13]
-    sbox7 = [4, 11, 2, 14, 15, 0, 8, 13, 3, 12, 9, 7, 5, 10, 6, 1,
-             13, 0, 11, 7, 4, 9, 1, 10, 14, 3, 5, 12, 2, 15, 8, 6,
-             1, 4, 11, 13, 12, 3, 7, 14, 10, 15, 6, 8, 0, 5, 9, 2,
-             6, 11, 13, 8, 1, 4, 10, 7, 9, 5, 0, 15, 14, 2, 3, 12]
-    sbox8 = [13, 2, 8, 4, 6, 15, 11, 1, 10, 9, 3, 14, 5, 0, 12, 7,
-             1, 15, 13, 8, 10, 3, 7, 4, 12, 5, 6, 11, 0, 14, 9, 2,
-             7, 11, 4, 1, 9, 12, 14, 2, 0, 6, 10, 13, 15, 3, 5, 8,
-             2, 1, 14, 7, 4, 10, 8, 13, 15, 12, 9, 0, 3, 5, 6, 11]
-
-    sboxs = [sbox1, sbox2, sbox3, sbox4, sbox5, sbox6, sbox7, sbox8]
-
     re_bin = ""
     left = 0
     right = 6
-    for box in sboxs:
+    for box in SBOXES:
         row = int(bin_str[left] + bin_str[right - 1], 2)
         col = int(bin_str[left + 1:right - 1], 2)
         re_bin += bin(box[row * 16 + col])[2:].zfill(4)
@@ -216,15 +300,7 @@ def p_displace(bin_str):
     """
     if len(bin_str) != 32:
         raise ValueError("二进制字符串长度必须是 32")
-    displace_table = [16, 7, 20, 21, 29, 12, 28, 17,
-                      1, 15, 23, 26, 5, 18, 31, 10,
-                      2, 8, 24, 14, 32, 27, 3, 9,
-                      19, 13, 30, 6, 22, 11, 4, 25]
-    re_bin = ""
-    for i in displace_table:
-        re_bin += bin_str[i - 1]
-
-    return re_bin
+    return displace_bin(bin_str, "P")
 
 
 def final_displace(bin_str):
@@ -235,19 +311,7 @@ def final_displace(bin_str):
     """
     if len(bin_str) != 64:
         raise ValueError("二进制字符串长度必须是 64")
-    displace_table = [40, 8, 48, 16, 56, 24, 64, 32,
-                      39, 7, 47, 15, 55, 23, 63, 31,
-                      38, 6, 46, 14, 54, 22, 62, 30,
-                      37, 5, 45, 13, 53, 21, 61, 29,
-                      36, 4, 44, 12, 52, 20, 60, 28,
-                      35, 3, 43, 11, 51, 19, 59, 27,
-                      34, 2, 42, 10, 50, 18, 58, 26,
-                      33, 1, 41, 9, 49, 17, 57, 25]
-    re_bin = ""
-    for i in displace_table:
-        re_bin += bin_str[i - 1]
-
-    return re_bin
+    return displace_bin(bin_str, "FP")
 
 
 def padding(bin_str):
@@ -275,6 +339,52 @@ def unpadding(bin_str):
     return bin_str[:bin_str.rfind("0")]
 
 
+def padding_bytes(data):
+    """
+    与 padding 等价的字节级填充：填充 0x7F 后再补 0xFF 至 8 字节的整数倍
+    :param data: 字节明文
+    :return: 填充后的字节串
+    """
+    n = 8 - len(data) % 8
+    return bytes(data) + b"\x7f" + b"\xff" * (n - 1)
+
+
+def unpadding_bytes(data):
+    """
+    与 unpadding 等价的字节级去填充
+    :param data: 填充后的字节明文
+    :return: 没有填充的字节串
+    """
+    data = bytes(data)
+    return data[:len(data.rstrip(b"\xff")) - 1]
+
+
+def pkcs7_padding(data, block_size=8):
+    """
+    PKCS#7 字节填充
+    :param data: 字节明文
+    :param block_size: 分组字节数
+    :return: 填充后的字节串
+    """
+    n = block_size - len(data) % block_size
+    return bytes(data) + bytes((n,)) * n
+
+
+def pkcs7_unpadding(data, block_size=8):
+    """
+    去除 PKCS#7 字节填充
+    :param data: 填充后的字节明文
+    :param block_size: 分组字节数
+    :return: 没有填充的字节串
+    """
+    if len(data) == 0 or len(data) % block_size != 0:
+        raise ValueError("填充后的数据长度必须是分组长度的整数倍")
+    n = data[-1]
+    if n < 1 or n > block_size or data[-n:] != bytes((n,)) * n:
+        raise ValueError("PKCS#7 填充格式错误")
+    return data[:-n]
+
+
 def encrypt_round(bin_str, subkeys_list):
     """
     进行 16 次迭代运算加密
@@ -357,6 +467,479 @@ def decrypt_round(bin_str, subkeys_list):
     return left_bin_str + right_bin_str
 
 
+def build_sp_tables():
+    """
+    将 8 个 S 盒与 P 置换合并为 SP 查找表
+    :return: 8 个 64 项的列表，以 6 位 S 盒输入为下标，值为经过 P 置换后的 32 位整数
+    """
+    sp_tables = []
+    for k, box in enumerate(SBOXES):
+        table = []
+        for six in range(64):
+            row = ((six >> 4) & 0b10) | (six & 1)
+            col = (six >> 1) & 0b1111
+            # 第 k 个 S 盒的 4 位输出位于 32 位结果中的第 4k+1 ~ 4k+4 位
+            table.append(permute_int(box[row * 16 + col] << (28 - 4 * k), P_TABLE, 32))
+        sp_tables.append(table)
+
+    return sp_tables
+
+
+SP_TABLES = build_sp_tables()
+
+
+def subkeys2int(subkeys_list):
+    """
+    将 16 个 48 位二进制子密钥串转换为整数引擎使用的格式
+    :param subkeys_list: init_subkeys 生成的子密钥列表
+    :return: 16 个元组，每个元组为子密钥按 S 盒切分出的 8 个 6 位整数
+    """
+    subkeys_int = []
+    for key_bin_48 in subkeys_list:
+        k = int(key_bin_48, 2)
+        subkeys_int.append(tuple((k >> (42 - 6 * i)) & 0x3F for i in range(8)))
+
+    return subkeys_int
+
+
+def init_subkeys_int(key):
+    """
+    整数形式的子密钥生成，与 subkeys2int(init_subkeys(...)) 结果一致
+    :param key: 64 位整数密钥
+    :return: 16 个元组，每个元组为子密钥按 S 盒切分出的 8 个 6 位整数
+    """
+    key_56 = get_displace("PC1")(key)
+    # get_subkey 返回的 56 位密钥与传入的相同，所以每轮压缩置换的输入都是 key_56，只需计算一次
+    k = get_displace("PC2")(key_56)
+    chunks = tuple((k >> (42 - 6 * i)) & 0x3F for i in range(8))
+    return [chunks] * 16
+
+
+def init_displace_int(block):
+    """
+    整数形式的初始置换（IP 置换）
+    :param block: 64 位整数明文块
+    :return: 置换后的 64 位整数
+    """
+    return get_displace("IP")(block)
+
+
+def final_displace_int(block):
+    """
+    整数形式的末置换（逆 IP 置换）
+    :param block: 64 位整数密文块
+    :return: 置换后的 64 位整数
+    """
+    return get_displace("FP")(block)
+
+
+def encrypt_round_int(block, subkeys_int):
+    """
+    整数形式的 16 次迭代运算加密，与 encrypt_round 结果一致；
+    每个子密钥做一轮，传入子密钥列表的切片即可只做其中的几轮
+    :param block: 经过初始置换的 64 位整数
+    :param subkeys_int: subkeys2int 生成的子密钥列表
+    :return: 迭代加密后的 64 位整数
+    """
+    sp1, sp2, sp3, sp4, sp5, sp6, sp7, sp8 = SP_TABLES
+    left = block >> 32
+    right = block & 0xFFFFFFFF
+    for k1, k2, k3, k4, k5, k6, k7, k8 in subkeys_int:
+        # 扩展置换：右部 32 位末尾接上第 1 位成 33 位，每 4 位取一个 6 位窗口；
+        # 第一个窗口按 E_TABLE 取第 2,1,2,3,4,5 位
+        x = (right << 1) | (right >> 31)
+        left, right = right, left ^ (sp1[(((right >> 25) & 0x20) | ((right >> 27) & 0x1F)) ^ k1] |
+                                     sp2[((x >> 24) & 0x3F) ^ k2] | sp3[((x >> 20) & 0x3F) ^ k3] |
+                                     sp4[((x >> 16) & 0x3F) ^ k4] | sp5[((x >> 12) & 0x3F) ^ k5] |
+                                     sp6[((x >> 8) & 0x3F) ^ k6] | sp7[((x >> 4) & 0x3F) ^ k7] |
+                                     sp8[(x & 0x3F) ^ k8])
+
+    return (left << 32) | right
+
+
+def decrypt_round_int(block, subkeys_int):
+    """
+    整数形式的 16 次迭代运算解密，与 decrypt_round 结果一致。
+    decrypt_round 的每一轮等价于：交换左右两半，做一轮 encrypt_round_int，再交换回来，
+    因此直接复用 encrypt_round_int 的轮函数，子密钥逆序
+    :param block: 经过初始置换的 64 位整数
+    :param subkeys_int: subkeys2int 生成的子密钥列表
+    :return: 迭代解密后的 64 位整数
+    """
+    block = encrypt_round_int(((block & 0xFFFFFFFF) << 32) | (block >> 32), subkeys_int[::-1])
+    return ((block & 0xFFFFFFFF) << 32) | (block >> 32)
+
+
+def encrypt_block(block, subkeys_int):
+    """
+    加密单个 64 位整数块
+    :param block: 64 位整数明文块
+    :param subkeys_int: subkeys2int 生成的子密钥列表
+    :return: 64 位整数密文块
+    """
+    return final_displace_int(encrypt_round_int(init_displace_int(block), subkeys_int))
+
+
+def decrypt_block(block, subkeys_int):
+    """
+    解密单个 64 位整数块
+    :param block: 64 位整数密文块
+    :param subkeys_int: subkeys2int 生成的子密钥列表
+    :return: 64 位整数明文块
+    """
+    return final_displace_int(decrypt_round_int(init_displace_int(block), subkeys_int))
+
+
+# 以上是本仓库沿用的 DES 变体：子密钥生成时不做循环左移（16 个子密钥相同），
+# 扩展置换第 1 位取右部第 2 位，16 轮后也不交换左右两部分，因此与标准 DES 的密文不同。
+# DES.encrypt/decrypt 为兼容旧密文继续使用它；需要与外部系统互通的 TripleDES 使用下面的标准 DES（FIPS 46-3）。
+def init_subkeys_std(key):
+    """
+    标准 DES 的子密钥生成：C、D 两半按 ROTATE_TABLE 循环左移后再做压缩置换
+    :param key: 64 位整数密钥
+    :return: 16 个元组，每个元组为子密钥按 S 盒切分出的 8 个 6 位整数
+    """
+    pc2 = get_displace("PC2")
+    key_56 = get_displace("PC1")(key)
+    c = key_56 >> 28
+    d = key_56 & 0xFFFFFFF
+    subkeys_int = []
+    for shift in ROTATE_TABLE:
+        c = ((c << shift) | (c >> (28 - shift))) & 0xFFFFFFF
+        d = ((d << shift) | (d >> (28 - shift))) & 0xFFFFFFF
+        k = pc2((c << 28) | d)
+        subkeys_int.append(tuple((k >> (42 - 6 * i)) & 0x3F for i in range(8)))
+
+    return subkeys_int
+
+
+def std_round_int(left, right, subkeys_int):
+    """
+    标准 DES 的 16 轮迭代，不含最后的左右交换；解密时传入逆序的子密钥
+    :param left: 左部 32 位整数
+    :param right: 右部 32 位整数
+    :param subkeys_int: init_subkeys_std 生成的子密钥列表（或其逆序）
+    :return: (left, right)
+    """
+    sp1, sp2, sp3, sp4, sp5, sp6, sp7, sp8 = SP_TABLES
+    for k1, k2, k3, k4, k5, k6, k7, k8 in subkeys_int:
+        # 标准扩展置换的第一个窗口为第 32,1,2,3,4,5 位
+        x = (right << 1) | (right >> 31)
+        left, right = right, left ^ (sp1[(((right & 1) << 5) | (right >> 27)) ^ k1] |
+                                     sp2[((x >> 24) & 0x3F) ^ k2] | sp3[((x >> 20) & 0x3F) ^ k3] |
+                                     sp4[((x >> 16) & 0x3F) ^ k4] | sp5[((x >> 12) & 0x3F) ^ k5] |
+                                     sp6[((x >> 8) & 0x3F) ^ k6] | sp7[((x >> 4) & 0x3F) ^ k7] |
+                                     sp8[(x & 0x3F) ^ k8])
+
+    return left, right
+
+
+def std_encrypt_block(block, subkeys_int):
+    """
+    标准 DES 加密单个 64 位整数块
+    :param block: 64 位整数明文块
+    :param subkeys_int: init_subkeys_std 生成的子密钥列表
+    :return: 64 位整数密文块
+    """
+    block = init_displace_int(block)
+    left, right = std_round_int(block >> 32, block & 0xFFFFFFFF, subkeys_int)
+    return final_displace_int((right << 32) | left)
+
+
+def std_decrypt_block(block, subkeys_int):
+    """
+    标准 DES 解密单个 64 位整数块
+    :param block: 64 位整数密文块
+    :param subkeys_int: init_subkeys_std 生成的子密钥列表
+    :return: 64 位整数明文块
+    """
+    block = init_displace_int(block)
+    left, right = std_round_int(block >> 32, block & 0xFFFFFFFF, subkeys_int[::-1])
+    return final_displace_int((right << 32) | left)
+
+
+def key2bytes(key):
+    """
+    :param key: 密钥文本字符串（按 UTF-8 编码）或 bytes/bytearray/memoryview
+    :return: 8 字节的密钥
+    """
+    if isinstance(key, str):
+        key = key.encode("UTF-8")
+    key = bytes(key)
+    if len(key) != 8:
+        raise ValueError("密钥长度必须是 64 位")
+    return key
+
+
+def make_schedule(key):
+    """
+    :param key: 8 字节的密钥
+    :return: (subkeys_list, subkeys_int)
+    """
+    subkeys_list = tuple(init_subkeys(format(int.from_bytes(key, "big"), "064b")))
+    return subkeys_list, tuple(subkeys2int(subkeys_list))
+
+
+def make_std_schedule(key):
+    """
+    :param key: 8 字节的密钥
+    :return: 标准 DES 的整数子密钥元组
+    """
+    return tuple(init_subkeys_std(int.from_bytes(key, "big")))
+
+
+class SubkeyCache(object):
+    """
+    线程安全、容量有限的 LRU 缓存，保存密钥到子密钥编排结果的映射
+    """
+
+    def __init__(self, maxsize=256, factory=make_schedule):
+        """
+        :param maxsize: 最多缓存的密钥个数
+        :param factory: 由 8 字节密钥计算子密钥编排的函数
+        """
+        if maxsize <= 0:
+            raise ValueError("缓存容量必须是正整数")
+        self.maxsize = maxsize
+        self.factory = factory
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        获取密钥对应的子密钥，未命中时计算并放入缓存
+        :param key: 密钥文本字符串或 8 字节的字节串
+        :return: factory 的结果，默认为 (subkeys_list, subkeys_int)，即二进制串形式和整数引擎形式的 16 个子密钥
+        """
+        key = key2bytes(key)
+        with self._lock:
+            schedule = self._data.get(key)
+            if schedule is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return schedule
+            self.misses += 1
+
+        # 子密钥的计算放在锁外进行，避免阻塞其他线程的命中查询
+        schedule = self.factory(key)
+        with self._lock:
+            self._data[key] = schedule
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+        return schedule
+
+    def info(self):
+        """
+        :return: 缓存统计信息字典
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "size": len(self._data), "maxsize": self.maxsize}
+
+    def clear(self):
+        """
+        清空缓存并重置计数
+        """
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+subkey_cache = SubkeyCache()
+std_subkey_cache = SubkeyCache(factory=make_std_schedule)
+
+
+class BlockCipher(object):
+    """
+    分组密码基类，子类提供 encrypt_block/decrypt_block，基类在其上实现文本的 ECB 加解密
+    """
+
+    def encrypt_block(self, block):
+        raise NotImplementedError
+
+    def decrypt_block(self, block):
+        raise NotImplementedError
+
+    def ecb_encrypt(self, data):
+        """
+        ECB 加密长度为 8 的整数倍的字节数据，不做填充
+        :param data: 支持缓冲区协议的明文
+        :return: 密文 bytes
+        """
+        data = memoryview(data).cast("B")
+        if len(data) % 8 != 0:
+            raise ValueError("数据长度必须是 8 的整数倍")
+        fmt = ">%dQ" % (len(data) // 8)
+        encrypt_block_l = self.encrypt_block
+        return struct.pack(fmt, *[encrypt_block_l(b) for b in struct.unpack(fmt, data)])
+
+    def ecb_decrypt(self, data):
+        """
+        ECB 解密长度为 8 的整数倍的字节数据，不去除填充
+        :param data: 支持缓冲区协议的密文
+        :return: 明文 bytes
+        """
+        data = memoryview(data).cast("B")
+        if len(data) % 8 != 0:
+            raise ValueError("数据长度必须是 8 的整数倍")
+        fmt = ">%dQ" % (len(data) // 8)
+        decrypt_block_l = self.decrypt_block
+        return struct.pack(fmt, *[decrypt_block_l(b) for b in struct.unpack(fmt, data)])
+
+    def encrypt_bytes(self, data):
+        """
+        ECB 加密任意长度的字节数据，使用 PKCS#7 填充
+        :param data: bytes/bytearray/memoryview 明文
+        :return: 密文 bytes
+        """
+        data = memoryview(data).cast("B")
+        # 整块部分直接在原缓冲区上加密，只有末尾不足一块的部分需要复制填充
+        full = len(data) - len(data) % 8
+        return self.ecb_encrypt(data[:full]) + self.ecb_encrypt(pkcs7_padding(data[full:]))
+
+    def decrypt_bytes(self, data):
+        """
+        ECB 解密并去除 PKCS#7 填充
+        :param data: bytes/bytearray/memoryview 密文
+        :return: 明文 bytes
+        """
+        return pkcs7_unpadding(self.ecb_decrypt(data))
+
+    def encrypt(self, enc_str):
+        """
+        :param enc_str: 待加密的文本
+        :return: 加密后的 16 进制格式字符串
+        """
+        # 沿用原有的 0x7F 0xFF... 填充，保证输出与以前一致
+        return bytes2hexstring(self.ecb_encrypt(padding_bytes(str(enc_str).encode("UTF-8"))))
+
+    def decrypt(self, dec_str):
+        """
+        :param dec_str: 待解密的 16 进制字符串
+        :return: 解密后的明文文本字符串
+        """
+        data = hexstring2bytes(dec_str[:len(dec_str) // 16 * 16])
+        return unpadding_bytes(self.ecb_decrypt(data)).decode("UTF-8")
+
+
+def get_schedule(key, cache=subkey_cache, factory=make_schedule):
+    """
+    :param key: 密钥文本字符串（UTF-8 编码后必须是 64 位）或 8 字节的字节串
+    :param cache: 子密钥缓存，传入 None 时不使用缓存
+    :param factory: 不使用缓存时计算子密钥编排的函数，应与 cache.factory 一致
+    :return: factory 的结果，默认为 (subkeys_list, subkeys_int)
+    """
+    if cache is None:
+        return factory(key2bytes(key))
+    return cache.get(key)
+
+
+class DESCipher(BlockCipher):
+    """
+    绑定单个密钥的 DES 加解密对象，持有该密钥的 16 个子密钥
+    """
+
+    def __init__(self, key, cache=subkey_cache):
+        """
+        :param key: 密钥文本字符串（UTF-8 编码后必须是 64 位）或 8 字节的字节串
+        :param cache: 子密钥缓存，传入 None 时不使用缓存
+        """
+        self.key = key
+        self.subkeys, self.subkeys_int = get_schedule(key, cache)
+
+    def encrypt_block(self, block):
+        """
+        :param block: 64 位整数明文块
+        :return: 64 位整数密文块
+        """
+        return encrypt_block(block, self.subkeys_int)
+
+    def decrypt_block(self, block):
+        """
+        :param block: 64 位整数密文块
+        :return: 64 位整数明文块
+        """
+        return decrypt_block(block, self.subkeys_int)
+
+
+class StandardDESCipher(BlockCipher):
+    """
+    绑定单个密钥的标准 DES（FIPS 46-3）加解密对象，密文可与其他标准实现互通
+    """
+
+    def __init__(self, key, cache=std_subkey_cache):
+        """
+        :param key: 密钥文本字符串（UTF-8 编码后必须是 64 位）或 8 字节的字节串
+        :param cache: 标准 DES 的子密钥缓存，传入 None 时不使用缓存
+        """
+        self.key = key
+        self.subkeys_int = get_schedule(key, cache, make_std_schedule)
+
+    def encrypt_block(self, block):
+        """
+        :param block: 64 位整数明文块
+        :return: 64 位整数密文块
+        """
+        return std_encrypt_block(block, self.subkeys_int)
+
+    def decrypt_block(self, block):
+        """
+        :param block: 64 位整数密文块
+        :return: 64 位整数明文块
+        """
+        return std_decrypt_block(block, self.subkeys_int)
+
+
+class TripleDES(BlockCipher):
+    """
+    3DES（TDEA，EDE）加解密对象：C = E_K3(D_K2(E_K1(P)))
+
+    三次都是标准 DES，结果与 NIST SP 800-67 一致，可与其他 3DES 实现互通。
+    相邻两次 DES 之间的末置换与初始置换互逆，可以抵消，
+    因此每个分组只做一次初始置换和一次末置换，中间只保留标准 DES 末尾的左右交换。
+    """
+
+    def __init__(self, key1, key2, key3=None, cache=std_subkey_cache):
+        """
+        :param key1: 第一个密钥，文本字符串或 8 字节的字节串
+        :param key2: 第二个密钥
+        :param key3: 第三个密钥，None 时与 key1 相同（双密钥 3DES）
+        :param cache: 标准 DES 的子密钥缓存，传入 None 时不使用缓存
+        """
+        if key3 is None:
+            key3 = key1
+        self.keys = (key1, key2, key3)
+        self.subkeys_int = tuple(get_schedule(k, cache, make_std_schedule) for k in self.keys)
+        self.subkeys_rev = tuple(k[::-1] for k in self.subkeys_int)
+
+    def encrypt_block(self, block):
+        """
+        :param block: 64 位整数明文块
+        :return: 64 位整数密文块
+        """
+        block = init_displace_int(block)
+        left, right = std_round_int(block >> 32, block & 0xFFFFFFFF, self.subkeys_int[0])
+        right, left = std_round_int(right, left, self.subkeys_rev[1])
+        left, right = std_round_int(left, right, self.subkeys_int[2])
+        return final_displace_int((right << 32) | left)
+
+    def decrypt_block(self, block):
+        """
+        :param block: 64 位整数密文块
+        :return: 64 位整数明文块
+        """
+        block = init_displace_int(block)
+        left, right = std_round_int(block >> 32, block & 0xFFFFFFFF, self.subkeys_rev[2])
+        right, left = std_round_int(right, left, self.subkeys_int[1])
+        left, right = std_round_int(left, right, self.subkeys_rev[0])
+        return final_displace_int((right << 32) | left)
+
+
 def encrypt(enc_str, key_str):
     """
     DES 加密主函数
@@ -364,27 +947,7 @@ def encrypt(enc_str, key_str):
     :param key_str: 密钥文本字符串
     :return: 加密后的 16 进制格式字符串
     """
-    global subkeys
-    # 若子密钥还未生成，先生成 16 个 48 位的子密钥
-    if subkeys is None:
-        subkeys = init_subkeys(string2bin(key_str))
-
-    # 对待加密串进行 64 位填充
-    enc_bin = padding(string2bin(str(enc_str)))
-    re_bin = ""
-
-    left = 0
-    right = 64
-    for_time = len(enc_bin) // 64
-    # 分段加密
-    for i in range(for_time):
-        bin_str = enc_bin[left:right]
-        # 对本段二进制明文串进行 DES 加密
-        re_bin += final_displace(encrypt_round(init_displace(bin_str), subkeys))
-        left = right
-        right += 64
-
-    return bin2hexstring(re_bin)
+    return DESCipher(key_str).encrypt(enc_str)
 
 
 def decrypt(dec_str, key_str):
@@ -394,27 +957,27 @@ def decrypt(dec_str, key_str):
     :param key_str: 密钥文本字符串
     :return: 解密后的明文文本字符串
     """
-    global subkeys
-    # 若子密钥还未生成，先生成 16 个 48 位的子密钥
-    if subkeys is None:
-        subkeys = init_subkeys(string2bin(key_str))
+    return DESCipher(key_str).decrypt(dec_str)
 
-    # 16 进制串转 2 进制串
-    dec_bin = hex2binstring(dec_str)
-    re_bin = ""
 
-    left = 0
-    right = 64
-    for_time = len(dec_bin) // 64
-    # 分段解密
-    for i in range(for_time):
-        bin_str = dec_bin[left:right]
-        # 对本段二进制密文串进行 DES 解密
-        re_bin += final_displace(decrypt_round(init_displace(bin_str), subkeys))
-        left = right
-        right += 64
+def encrypt_bytes(data, key):
+    """
+    DES 字节加密主函数（ECB，PKCS#7 填充）
+    :param data: bytes/bytearray/memoryview 明文
+    :param key: 密钥文本字符串或 8 字节的字节串
+    :return: 密文 bytes
+    """
+    return DESCipher(key).encrypt_bytes(data)
 
-    return bin2string(unpadding(re_bin))
+
+def decrypt_bytes(data, key):
+    """
+    DES 字节解密主函数（ECB，PKCS#7 填充）
+    :param data: bytes/bytearray/memoryview 密文
+    :param key: 密钥文本字符串或 8 字节的字节串
+    :return: 明文 bytes
+    """
+    return DESCipher(key).decrypt_bytes(data)
 
 
 def bin2hexstring(bin_str):
@@ -448,6 +1011,32 @@ def hex2binstring(hex_str):
     return re_str
 
 
+def bytes2hexstring(data):
+    """
+    字节串转十六进制串
+    :param data: 字节串
+    :return: 小写十六进制串
+    """
+    return data.hex()
+
+
+def hexstring2bytes(hex_str):
+    """
+    十六进制串转字节串
+    :param hex_str: 十六进制串
+    :return: 字节串
+    """
+    return bytes.fromhex(hex_str)
+
+
+# 设置环境变量 CIPHER_PROFILE=1 时开启分阶段性能统计，见 profiler.py。
+# 统计器替换的是被导入的模块中的函数，直接运行本文件时代码在 __main__ 中，不会被统计，因此不开启
+if __name__ != '__main__' and os.environ.get("CIPHER_PROFILE", "") not in ("", "0"):
+    import profiler
+
+    profiler.enable_from_env()
+
+
 if __name__ == '__main__':
     message = "世界你好"
     key = "12345678"  # 按 UTF-8 编码转即为 64 位
@@ -17,7 +17,9 @@
 """
 import hashlib
 import math
-from prime import isprime
+import mmap
+import os
+from prime import isprime, random_primes
 
 
 def isrelativelyprime(a, b):
@@ -57,21 +59,60 @@ def isrelativelyprime(a, b):
 
 def ex_gcd(a, b):
     """
-        扩展欧几里得算法
+        扩展欧几里得算法（迭代实现，不受递归深度限制）
         :param a:
         :param b:
         :return: ans, x, y = 最大公约数，一组解 (x, y)
         """
-    result = [1, 0]
+    # 循环不变式：a0 * x0 + b0 * y0 == a，a0 * x1 + b0 * y1 == b
+    x0, y0, x1, y1 = 1, 0, 0, 1
+    while b != 0:
+        quot, rem = divmod(a, b)
+        a, b = b, rem
+        x0, x1 = x1, x0 - quot * x1
+        y0, y1 = y1, y0 - quot * y1
+    return a, x0, y0
 
-    def ex_gcd_inter(a_l, b_l, result_l):
-        if 0 == b_l:
-            return a_l
-        ans = ex_gcd_inter(b_l, a_l % b_l, result_l)
-        result_l[0], result_l[1] = result_l[1], result_l[0] - (a_l // b_l) * result_l[1]
-        return ans
 
-    return ex_gcd_inter(a, b, result), result[0], result[1]
+def mod_inverse(a, m):
+    """
+    求 a 模 m 的逆元，只使用整数运算
+    :param a:
+    :param m: 模数，大于 1
+    :return: 0 <= x < m 且 a * x % m == 1
+    """
+    gcd, x, _ = ex_gcd(a % m, m)
+    if gcd != 1:
+        raise ValueError("%d 与模数不互质，不存在逆元" % a)
+    return x % m
+
+
+def batch_inverse(values, m):
+    """
+    Montgomery 批量求逆：n 个数模同一个 m 的逆元只需要 1 次求逆和约 3n 次乘法
+    :param values: 与 m 互质的整数序列
+    :param m: 模数，大于 1
+    :return: 逆元列表，顺序与 values 一致
+    """
+    values = list(values)
+    if not values:
+        return []
+    # prefix[i] = values[0] * ... * values[i] % m
+    prefix = []
+    acc = 1
+    for v in values:
+        acc = acc * v % m
+        prefix.append(acc)
+    try:
+        inv = mod_inverse(acc, m)
+    except ValueError:
+        raise ValueError("存在与模数不互质的数，不存在逆元")
+    result = [0] * len(values)
+    for i in range(len(values) - 1, 0, -1):
+        result[i] = inv * prefix[i - 1] % m
+        inv = inv * values[i] % m
+    result[0] = inv
+    return result
 
 
 def get_e(fn_l):
@@ -105,13 +146,12 @@ def get_d(e_l, fn_l):
     gcd, x, y = ex_gcd(e_l, fn_l)
     if 1 % gcd != 0:
         return -1
-    x *= 1 // gcd
-    fn_l /= gcd
+    # gcd 为 1，全程保持整数运算，大模数下不会丢失精度
     fn_l = abs(fn_l)
     x %= fn_l
     if x <= 0:
         x += fn_l
-    return int(x)
+    return x
 
 
 def string2bin(str_l):
@@ -121,11 +161,8 @@ def string2bin(str_l):
       :return: 二进制格式的字符串
     """
     str_l = str(str_l)
-    bin_str = ""
-    for b in bytes(str_l, encoding="UTF-8"):
-        bin_str += bin(int(b))[2:].zfill(8)
-
-    return bin_str
+    # 逐段拼接字符串是平方复杂度，改为一次 join
+    return "".join(format(b, "08b") for b in bytes(str_l, encoding="UTF-8"))
 
 
 def bin2string(bin_str):
@@ -145,42 +182,145 @@ def bin2string(bin_str):
     return re_bytes.decode(encoding="UTF-8")
 
 
-def encrypt(m_l, e_l, n_l):
+def encrypt_inter(m_l_l, e_l_l, n_l_l):
     """
-    分段加密消息，返回拼接后的密文
-    :param m_l: 消息明文
-    :param e_l: 公钥
-    :param n_l: n = p * q
-    :return: 加密后拼接而成的 16 进制格式密文
+    加密消息段的整数值，返回密文 c
+    :param m_l_l: 消息明文
+    :param e_l_l: 公钥
+    :param n_l_l: n = p * q
+    :return: 消息密文 c = m^e % n
     """
+    if not isinstance(m_l_l, int) or not isinstance(e_l_l, int) or not isinstance(n_l_l, int):
+        raise ValueError("消息明文，公钥和 n 都必须是整型数据")
+    # 三参数 pow 每一步都先取模，中间结果不会超过 n^2
+    return pow(m_l_l, e_l_l, n_l_l)
 
-    def encrypt_inter(m_l_l, e_l_l, n_l_l):
-        """
-        加密消息段的整数值，返回密文 c
-        :param m_l_l: 消息明文
-        :param e_l_l: 公钥
-        :param n_l_l: n = p * q
-        :return: 消息密文 c = m^e % n
-        """
-        if not isinstance(m_l_l, int) or not isinstance(e_l_l, int) or not isinstance(n_l_l, int):
-            raise ValueError("消息明文，公钥和 n 都必须是整型数据")
-        return (m_l_l ** e_l_l) % n_l_l
 
-    bin_n = bin(n_l)[2:]
-    n_len = len(bin_n)
-    bin_m = string2bin(m_l)
-    bin_m_len = len(bin_m)
+def decrypt_inter(c_l_l, d_l_l, n_l_l):
+    """
+    解密消息段的整数值，返回明文 m
+    :param c_l_l: 消息密文
+    :param d_l_l: 私钥
+    :param n_l_l: n = p * q
+    :return: 消息明文 m = c^d % n
+    """
+    if not isinstance(c_l_l, int) or not isinstance(d_l_l, int) or not isinstance(n_l_l, int):
+        raise ValueError("消息密文，私钥和 n 都必须是整型数据")
+    return pow(c_l_l, d_l_l, n_l_l)
+
+
+def decrypt_crt(c_l_l, p_l, q_l, dp_l, dq_l, qinv_l):
+    """
+    用中国剩余定理解密消息段的整数值，结果与 decrypt_inter 相同
+    分别在模 p、模 q 下做指数减半的幂运算，再用 Garner 公式合并
+    :param c_l_l: 消息密文
+    :param p_l: 素数 p
+    :param q_l: 素数 q
+    :param dp_l: d mod (p-1)
+    :param dq_l: d mod (q-1)
+    :param qinv_l: q 模 p 的逆元
+    :return: 消息明文 m = c^d % n
+    """
+    m1 = pow(c_l_l, dp_l, p_l)
+    m2 = pow(c_l_l, dq_l, q_l)
+    h = (qinv_l * (m1 - m2)) % p_l
+    return m2 + h * q_l
 
+
+def decrypt_garner(c_l_l, primes, exponents, coefficients):
+    """
+    多素数 RSA 的 CRT 解密：对每个素数 r_i 求 c^(d mod (r_i-1)) mod r_i，
+    再用 Garner 算法逐个合并，结果与 decrypt_inter 相同
+    :param c_l_l: 消息密文
+    :param primes: 素数 r_1, r_2, ...
+    :param exponents: d mod (r_i - 1)
+    :param coefficients: coefficients[i] 为 r_1 * ... * r_i 模 r_(i+1) 的逆元，i 从 1 开始，coefficients[0] 不使用
+    :return: 消息明文 m = c^d % n
+    """
+    m = pow(c_l_l, exponents[0], primes[0])
+    r = primes[0]
+    for i in range(1, len(primes)):
+        r_i = primes[i]
+        h = (pow(c_l_l, exponents[i], r_i) - m) * coefficients[i] % r_i
+        m += r * h
+        r *= r_i
+    return m
+
+
+def split_message(bin_m, n_len):
+    """
+    把明文二进制串按 n_len - 1 位分段
+    :param bin_m: 明文二进制串
+    :param n_len: n 的二进制位数
+    :return: 各段的整数值列表
+    """
+    bin_m_len = len(bin_m)
     left = 0
     right = n_len - 1 if n_len < bin_m_len else bin_m_len - 1
 
-    bin_enc = bin(encrypt_inter(int(bin_m[left:right], 2), e_l, n_l))[2:].zfill(n_len)
+    values = [int(bin_m[left:right], 2)]
     for i in range(right, bin_m_len, n_len - 1):
         left = right
         right = i + n_len - 1
-        bin_enc += bin(encrypt_inter(int(bin_m[left:right], 2), e_l, n_l))[2:].zfill(n_len)
+        values.append(int(bin_m[left:right], 2))
+
+    return values
+
+
+def join_cipher(values, n_len):
+    """
+    把各段密文按 n_len 位补齐后拼接
+    :param values: 各段密文的整数值
+    :param n_len: n 的二进制位数
+    :return: 16 进制格式密文
+    """
+    return hex(int("".join(bin(v)[2:].zfill(n_len) for v in values), 2))[2:]
 
-    return hex(int(bin_enc, 2))[2:]
+
+def split_cipher(c_l, n_len):
+    """
+    把 16 进制密文按 n_len 位分段
+    :param c_l: 16 进制格式密文
+    :param n_len: n 的二进制位数
+    :return: 各段的整数值列表
+    """
+    bin_c = bin(int(c_l, 16))[2:]
+    bin_c = bin_c.zfill(math.ceil(len(bin_c) / n_len) * n_len)
+    return [int(bin_c[left:left + n_len], 2) for left in range(0, len(bin_c), n_len)]
+
+
+def join_message(values, n_len):
+    """
+    把各段明文拼接成明文二进制串，最后一段补齐到字节边界
+    :param values: 各段明文的整数值
+    :param n_len: n 的二进制位数
+    :return: 明文二进制串
+    """
+    parts = [bin(values[0])[2:].zfill(n_len - 1)]
+    for v in values[1:-1]:
+        parts.append(bin(v)[2:].zfill(n_len - 1))
+    if len(values) > 1:
+        tmp_bin = bin(values[-1])[2:]
+        need_size = (sum(len(part) for part in parts) + len(tmp_bin)) % 8
+        if 0 == need_size:
+            parts.append(tmp_bin)
+        else:
+            parts.append(tmp_bin.zfill((8 - need_size) + len(tmp_bin)))
+
+    return "".join(parts)
+
+
+def encrypt(m_l, e_l, n_l):
+    """
+    分段加密消息，返回拼接后的密文
+    :param m_l: 消息明文
+    :param e_l: 公钥
+    :param n_l: n = p * q
+    :return: 加密后拼接而成的 16 进制格式密文
+    """
+    n_len = n_l.bit_length()
+    values = split_message(string2bin(m_l), n_len)
+    return join_cipher([encrypt_inter(v, e_l, n_l) for v in values], n_len)
 
 
 def decrypt(c_l, d_l, n_l):
@@ -191,42 +331,474 @@ def decrypt(c_l, d_l, n_l):
     :param n_l: n = p * q
     :return: 解密后拼接而成的明文
     """
+    n_len = n_l.bit_length()
+    values = split_cipher(c_l, n_len)
+    return bin2string(join_message([decrypt_inter(v, d_l, n_l) for v in values], n_len))
+
+
+def block_sizes(n_l):
+    """
+    字节分组的长度
+    明文分组在数据前加一个 0x01 标记字节，保证前导 0 字节不丢失、最后一组可以不满，
+    且整数值小于 n；密文分组为 n 的字节数
+    :param n_l: n = p * q，至少 17 位
+    :return: (每组明文数据字节数, 每组密文字节数)
+    """
+    n_len = n_l.bit_length()
+    if n_len < 17:
+        raise ValueError("字节分组要求 n 至少为 17 位")
+    return (n_len - 1) // 8 - 1, (n_len + 7) // 8
+
+
+def rechunk(chunks, size):
+    """
+    把任意长度的字节块重新切成 size 字节一块，最后一块可能不足
+    :param chunks: 字节块的可迭代对象
+    :param size: 块大小
+    :return: 字节块的生成器
+    """
+    buf = bytearray()
+    for chunk in chunks:
+        buf += chunk
+        if len(buf) < size:
+            continue
+        whole = len(buf) - len(buf) % size
+        for left in range(0, whole, size):
+            yield bytes(buf[left:left + size])
+        del buf[:whole]
+    if buf:
+        yield bytes(buf)
+
+
+def encrypt_blocks(chunks, modexp, n_l):
+    """
+    :param chunks: 明文字节块的可迭代对象
+    :param modexp: 对单个整数做公钥运算的函数
+    :param n_l: n = p * q
+    :return: 密文分组的生成器，每组为 n 的字节数
+    """
+    data_size, block_size = block_sizes(n_l)
+    for block in rechunk(chunks, data_size):
+        value = int.from_bytes(block, "big") | (1 << (8 * len(block)))
+        yield modexp(value).to_bytes(block_size, "big")
+
+
+def decrypt_blocks(chunks, modexp, n_l):
+    """
+    :param chunks: 密文字节块的可迭代对象，总长度须为分组长度的整数倍
+    :param modexp: 对单个整数做私钥运算的函数
+    :param n_l: n = p * q
+    :return: 明文字节块的生成器
+    """
+    block_size = block_sizes(n_l)[1]
+    for block in rechunk(chunks, block_size):
+        if len(block) != block_size:
+            raise ValueError("密文长度不是分组长度的整数倍")
+        value = int.from_bytes(block, "big")
+        if value >= n_l:
+            raise ValueError("密文分组不小于 n")
+        value = modexp(value)
+        length = (value.bit_length() - 1) // 8
+        # 最高位必须恰好是 0x01 标记字节，否则密钥或密文有误；全 0 分组没有标记字节
+        if value == 0 or value >> (8 * length) != 1:
+            raise ValueError("解密失败，密钥与密文不匹配")
+        yield (value ^ (1 << (8 * length))).to_bytes(length, "big")
+
+
+def encrypt_stream(chunks, e_l, n_l):
+    """
+    流式加密，边读边产出密文分组，不会把整个消息转成二进制串
+    :param chunks: 明文字节块的可迭代对象，如 iter(partial(fp.read, 65536), b"")
+    :param e_l: 公钥
+    :param n_l: n = p * q，至少 17 位
+    :return: 密文分组的生成器
+    """
+    return encrypt_blocks(chunks, lambda v: encrypt_inter(v, e_l, n_l), n_l)
+
+
+def decrypt_stream(chunks, d_l, n_l):
+    """
+    流式解密，与 encrypt_stream 对应
+    :param chunks: 密文字节块的可迭代对象，分块方式任意
+    :param d_l: 私钥
+    :param n_l: n = p * q
+    :return: 明文字节块的生成器
+    """
+    return decrypt_blocks(chunks, lambda v: decrypt_inter(v, d_l, n_l), n_l)
+
+
+def encrypt_bytes(m_bytes, e_l, n_l):
+    """
+    :param m_bytes: 明文字节串
+    :param e_l: 公钥
+    :param n_l: n = p * q，至少 17 位
+    :return: 密文字节串
+    """
+    return b"".join(encrypt_stream((m_bytes,), e_l, n_l))
+
+
+def decrypt_bytes(c_bytes, d_l, n_l):
+    """
+    :param c_bytes: 密文字节串
+    :param d_l: 私钥
+    :param n_l: n = p * q
+    :return: 明文字节串
+    """
+    return b"".join(decrypt_stream((c_bytes,), d_l, n_l))
+
+
+def hash_message(message, algorithm="sha256"):
+    """
+    :param message: 字节串或文本字符串（按 UTF-8 编码）
+    :param algorithm: hashlib 支持的摘要算法名
+    :return: 摘要字节串
+    """
+    if isinstance(message, str):
+        message = message.encode("UTF-8")
+    return hashlib.new(algorithm, message).digest()
+
+
+def hash_file(path, algorithm="sha256", chunk_size=1024 * 1024, use_mmap=False):
+    """
+    分块计算文件摘要，内存占用与文件大小无关
+    :param path: 文件路径或以二进制方式打开的类文件对象
+    :param algorithm: hashlib 支持的摘要算法名
+    :param chunk_size: 每次读入的字节数
+    :param use_mmap: 为 True 时通过内存映射读取，path 必须是路径或真实文件
+    :return: 摘要字节串
+    """
+    h = hashlib.new(algorithm)
+    if isinstance(path, (str, bytes, os.PathLike)):
+        with open(path, "rb") as fp:
+            return hash_fp(fp, h, chunk_size, use_mmap)
+    return hash_fp(path, h, chunk_size, use_mmap)
+
+
+def hash_fp(fp, h, chunk_size, use_mmap):
+    if use_mmap:
+        size = os.fstat(fp.fileno()).st_size
+        # 空文件无法映射
+        if size:
+            with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm)
+                try:
+                    for left in range(0, size, chunk_size):
+                        h.update(view[left:left + chunk_size])
+                finally:
+                    view.release()
+        return h.digest()
+    # 复用同一块缓冲区，避免每次读取都分配新的字节串
+    buf = bytearray(chunk_size)
+    view = memoryview(buf)
+    while True:
+        n = fp.readinto(buf)
+        if not n:
+            break
+        h.update(view[:n])
+    return h.digest()
+
+
+def sign_file(path, key, algorithm="sha256", use_mmap=False):
+    """
+    文件签名：流式计算摘要，再按 RSASSA-PKCS1-v1_5 做一次私钥运算
+    :param path: 文件路径或以二进制方式打开的类文件对象
+    :param key: RSAPrivateKey
+    :param algorithm: DIGEST_INFO_PREFIXES 中的摘要算法名
+    :param use_mmap: 是否通过内存映射读取
+    :return: 签名字节串
+    """
+    return key.sign_digest(hash_file(path, algorithm, use_mmap=use_mmap), algorithm)
+
+
+def verify_file(path, signature, key, algorithm="sha256", use_mmap=False):
+    """
+    :param path: 文件路径或以二进制方式打开的类文件对象
+    :param signature: sign_file 得到的签名
+    :param key: RSAPublicKey 或 RSAPrivateKey
+    :param algorithm: 签名时使用的摘要算法
+    :param use_mmap: 是否通过内存映射读取
+    :return: 签名有效返回 True 否则返回 False
+    """
+    return key.verify_digest(hash_file(path, algorithm, use_mmap=use_mmap), signature, algorithm)
+
 
-    def decrypt_inter(c_l_l, d_l_l, n_l_l):
+# EMSA-PKCS1-v1_5 中各摘要算法的 DigestInfo 前缀（RFC 8017 第 9.2 节），键为 hashlib 的算法名
+DIGEST_INFO_PREFIXES = {
+    "md5": bytes.fromhex("3020300c06082a864886f70d020505000410"),
+    "sha1": bytes.fromhex("3021300906052b0e03021a05000414"),
+    "sha224": bytes.fromhex("302d300d06096086480165030402040500041c"),
+    "sha256": bytes.fromhex("3031300d060960864801650304020105000420"),
+    "sha384": bytes.fromhex("3041300d060960864801650304020205000430"),
+    "sha512": bytes.fromhex("3051300d060960864801650304020305000440"),
+    "sha512_224": bytes.fromhex("302d300d06096086480165030402050500041c"),
+    "sha512_256": bytes.fromhex("3031300d060960864801650304020605000420"),
+}
+
+
+def emsa_pkcs1_v15_encode(digest, algorithm, k):
+    """
+    EMSA-PKCS1-v1_5 编码：0x00 0x01 0xFF...0xFF 0x00 DigestInfo
+    :param digest: 摘要字节串
+    :param algorithm: 计算摘要使用的 hashlib 算法名
+    :param k: n 的字节数
+    :return: 长度为 k 的编码结果
+    """
+    h = hashlib.new(algorithm)
+    prefix = DIGEST_INFO_PREFIXES.get(h.name)
+    if prefix is None:
+        raise ValueError("不支持的摘要算法：%s" % algorithm)
+    if len(digest) != h.digest_size:
+        raise ValueError("摘要长度与算法 %s 不符" % h.name)
+    t = prefix + bytes(digest)
+    if k < len(t) + 11:
+        raise ValueError("密钥太短，无法容纳 %s 的签名编码" % h.name)
+    return b"\x00\x01" + b"\xff" * (k - len(t) - 3) + b"\x00" + t
+
+
+class RSAPublicKey(object):
+    """
+    RSA 公钥，分段与编码方式与模块级的 encrypt 相同
+    """
+
+    def __init__(self, n, e):
         """
-        解密消息段的整数值，返回明文 m
-        :param c_l_l: 消息密文
-        :param d_l_l: 私钥
-        :param n_l_l: n = p * q
-        :return: 消息明文 m = c^d % n
+        :param n: n = p * q
+        :param e: 公钥
         """
-        if not isinstance(c_l_l, int) or not isinstance(d_l_l, int) or not isinstance(n_l_l, int):
-            raise ValueError("消息密文，私钥和 n 都必须是整型数据")
-        return (c_l_l ** d_l_l) % n_l_l
+        if not isinstance(n, int) or not isinstance(e, int):
+            raise ValueError("n 和公钥都必须是整型数据")
+        self.n = n
+        self.e = e
 
-    bin_n = bin(n_l)[2:]
-    n_len = len(bin_n)
-    bin_c = bin(int(c_l, 16))[2:]
-    bin_c = bin_c.zfill(math.ceil(len(bin_c) / n_len) * n_len)
-    c_len = len(bin_c)
-    left = 0
-    right = n_len
+    def encrypt_int(self, m_l):
+        """
+        :param m_l: 小于 n 的整数
+        :return: m^e % n
+        """
+        return encrypt_inter(m_l, self.e, self.n)
 
-    bin_dec = bin(decrypt_inter(int(bin_c[left:right], 2), d_l, n_l))[2:].zfill(n_len - 1)
-    for i in range(right, c_len, n_len):
-        left = right
-        right = i + n_len
-        if right == c_len:
-            tmp_bin = bin(decrypt_inter(int(bin_c[left:right], 2), d_l, n_l))[2:]
-            need_size = (len(bin_dec) + len(tmp_bin)) % 8
-            if 0 == need_size:
-                bin_dec += tmp_bin
-            else:
-                bin_dec += tmp_bin.zfill((8 - need_size) + len(tmp_bin))
-        else:
-            bin_dec += bin(decrypt_inter(int(bin_c[left:right], 2), d_l, n_l))[2:].zfill(n_len - 1)
+    def encrypt(self, m_l):
+        """
+        :param m_l: 消息明文
+        :return: 16 进制格式密文，与 encrypt(m_l, e, n) 相同
+        """
+        n_len = self.n.bit_length()
+        values = split_message(string2bin(m_l), n_len)
+        return join_cipher([encrypt_inter(v, self.e, self.n) for v in values], n_len)
 
-    return bin2string(bin_dec)
+    def encrypt_stream(self, chunks):
+        """
+        :param chunks: 明文字节块的可迭代对象
+        :return: 密文分组的生成器，见模块级的 encrypt_stream
+        """
+        return encrypt_blocks(chunks, self.encrypt_int, self.n)
+
+    def encrypt_bytes(self, m_bytes):
+        return b"".join(self.encrypt_stream((m_bytes,)))
+
+    def verify_digest(self, digest, signature, algorithm="sha256"):
+        """
+        RSASSA-PKCS1-v1_5 验签：对签名做公钥运算，与摘要的 EMSA-PKCS1-v1_5 编码比较
+        :param digest: 摘要字节串
+        :param signature: sign_digest 得到的签名
+        :param algorithm: 计算摘要使用的 hashlib 算法名
+        :return: 签名有效返回 True 否则返回 False
+        """
+        k = (self.n.bit_length() + 7) // 8
+        if len(signature) != k:
+            return False
+        value = int.from_bytes(signature, "big")
+        if value >= self.n:
+            return False
+        return self.encrypt_int(value).to_bytes(k, "big") == emsa_pkcs1_v15_encode(digest, algorithm, k)
+
+    def verify(self, message, signature, algorithm="sha256"):
+        """
+        :param message: 字节串或文本字符串
+        :param signature: sign 得到的签名
+        :param algorithm: 签名时使用的摘要算法
+        :return: 签名有效返回 True 否则返回 False
+        """
+        return self.verify_digest(hash_message(message, algorithm), signature, algorithm)
+
+    def __repr__(self):
+        return "RSAPublicKey(n=%d, e=%d)" % (self.n, self.e)
+
+
+class RSAPrivateKey(RSAPublicKey):
+    """
+    RSA 私钥，保存 p、q 以及 CRT 参数 dP、dQ、qInv，解密时走中国剩余定理
+    """
+
+    def __init__(self, p, q, e, d=None):
+        """
+        :param p: 素数 p
+        :param q: 素数 q，不能与 p 相等
+        :param e: 公钥
+        :param d: 私钥，None 时按 e 模 ψ(n) 的逆元计算（与 get_d 相同）
+        """
+        if not all(isinstance(v, int) for v in (p, q, e)) or not (d is None or isinstance(d, int)):
+            raise ValueError("p、q、公钥和私钥都必须是整型数据")
+        if p == q:
+            raise ValueError("p 和 q 不能相等")
+        super(RSAPrivateKey, self).__init__(p * q, e)
+        fn = (p - 1) * (q - 1)
+        if d is None:
+            d = mod_inverse(e, fn)
+        self.p = p
+        self.q = q
+        self.d = d
+        self.dp = d % (p - 1)
+        self.dq = d % (q - 1)
+        self.qinv = mod_inverse(q, p)
+
+    def public_key(self):
+        return RSAPublicKey(self.n, self.e)
+
+    def decrypt_int(self, c_l):
+        """
+        :param c_l: 小于 n 的整数
+        :return: c^d % n
+        """
+        return decrypt_crt(c_l, self.p, self.q, self.dp, self.dq, self.qinv)
+
+    def decrypt(self, c_l):
+        """
+        :param c_l: 16 进制格式密文
+        :return: 明文，与 decrypt(c_l, d, n) 相同
+        """
+        n_len = self.n.bit_length()
+        decrypt_int = self.decrypt_int
+        values = [decrypt_int(v) for v in split_cipher(c_l, n_len)]
+        return bin2string(join_message(values, n_len))
+
+    def decrypt_stream(self, chunks):
+        """
+        :param chunks: 密文字节块的可迭代对象
+        :return: 明文字节块的生成器，用 CRT 解密，结果与模块级的 decrypt_stream 相同
+        """
+        return decrypt_blocks(chunks, self.decrypt_int, self.n)
+
+    def decrypt_bytes(self, c_bytes):
+        return b"".join(self.decrypt_stream((c_bytes,)))
+
+    def sign_digest(self, digest, algorithm="sha256"):
+        """
+        RSASSA-PKCS1-v1_5 签名：对摘要做 EMSA-PKCS1-v1_5 编码后再做私钥运算
+        :param digest: 摘要字节串
+        :param algorithm: 计算摘要使用的 hashlib 算法名
+        :return: 签名，长度为 n 的字节数
+        """
+        k = (self.n.bit_length() + 7) // 8
+        value = self.decrypt_int(int.from_bytes(emsa_pkcs1_v15_encode(digest, algorithm, k), "big"))
+        return value.to_bytes(k, "big")
+
+    def sign(self, message, algorithm="sha256"):
+        """
+        :param message: 字节串或文本字符串
+        :param algorithm: DIGEST_INFO_PREFIXES 中的摘要算法名
+        :return: 签名字节串
+        """
+        return self.sign_digest(hash_message(message, algorithm), algorithm)
+
+    def __repr__(self):
+        # 只显示公开部分，避免私钥出现在日志、异常栈和调试器中
+        return "RSAPrivateKey(bits=%d, e=%d)" % (self.n.bit_length(), self.e)
+
+
+class RSAMultiPrimeKey(RSAPrivateKey):
+    """
+    多素数 RSA 私钥：n = r_1 * r_2 * ... * r_k
+    同样位数的 n，素数越多每次模幂的模数越短，解密越快；公钥运算与两素数时完全相同
+    """
+
+    def __init__(self, primes, e, d=None):
+        """
+        :param primes: 互不相同的素数列表，至少 2 个
+        :param e: 公钥
+        :param d: 私钥，None 时按 e 模 ψ(n) 的逆元计算
+        """
+        primes = list(primes)
+        if len(primes) < 2:
+            raise ValueError("至少需要 2 个素数")
+        if not all(isinstance(v, int) for v in primes + [e]) or not (d is None or isinstance(d, int)):
+            raise ValueError("素数、公钥和私钥都必须是整型数据")
+        if len(set(primes)) != len(primes):
+            raise ValueError("素数不能重复")
+        n = 1
+        fn = 1
+        for r in primes:
+            n *= r
+            fn *= r - 1
+        RSAPublicKey.__init__(self, n, e)
+        if d is None:
+            d = mod_inverse(e, fn)
+        self.primes = primes
+        self.d = d
+        self.exponents = [d % (r - 1) for r in primes]
+        self.coefficients = [0]
+        product = primes[0]
+        for r in primes[1:]:
+            self.coefficients.append(mod_inverse(product, r))
+            product *= r
+        # 与两素数私钥保持相同的属性，含义同 RFC 8017 多素数私钥表示中前两个素数的 p、q、dP、dQ、qInv
+        self.p, self.q = primes[0], primes[1]
+        self.dp, self.dq = self.exponents[0], self.exponents[1]
+        self.qinv = mod_inverse(self.q, self.p)
+
+    def decrypt_int(self, c_l):
+        """
+        :param c_l: 小于 n 的整数
+        :return: c^d % n
+        """
+        return decrypt_garner(c_l, self.primes, self.exponents, self.coefficients)
+
+    def __repr__(self):
+        return "RSAMultiPrimeKey(bits=%d, primes=%d, e=%d)" % (self.n.bit_length(), len(self.primes), self.e)
+
+
+def generate_keypair(bits=2048, e=65537, workers=None, primes=2):
+    """
+    生成 RSA 密钥对，素数由 prime.random_primes 经小素数筛与 Miller-Rabin 测试得到
+    :param bits: n 的二进制位数，如 2048、3072、4096
+    :param e: 公钥，默认 65537
+    :param workers: 搜索素数的进程数，None 或 1 时在当前进程中搜索
+    :param primes: 素数个数，大于 2 时生成多素数密钥
+    :return: 两素数时为 RSAPrivateKey，否则为 RSAMultiPrimeKey；n 恰好为 bits 位
+    """
+    if primes < 2:
+        raise ValueError("至少需要 2 个素数")
+    if bits < 16 * primes:
+        raise ValueError("每个素数至少为 16 位")
+    if e < 3 or e & 1 == 0:
+        raise ValueError("公钥必须是大于 2 的奇数")
+    # 位数尽量平均分配，多出的位给前面的素数
+    sizes = [bits // primes + (1 if i < bits % primes else 0) for i in range(primes)]
+    while True:
+        factors = []
+        for size in sorted(set(sizes), reverse=True):
+            factors += random_primes(size, sizes.count(size), e, workers)
+        n = 1
+        fn = 1
+        for r in factors:
+            n *= r
+            fn *= r - 1
+        # 每个素数最高两位为 1，两个素数时乘积必为 bits 位，三个及以上时可能少一位
+        if n.bit_length() != bits:
+            continue
+        # e 为素数时筛选阶段已保证互质，这里兼顾 e 为合数的情况
+        if math.gcd(e, fn) == 1:
+            if primes == 2:
+                return RSAPrivateKey(factors[0], factors[1], e)
+            return RSAMultiPrimeKey(factors, e)
+
+
+# 设置环境变量 CIPHER_PROFILE=1 时开启分阶段性能统计，见 profiler.py。
+# 统计器替换的是被导入的模块中的函数，直接运行本文件时代码在 __main__ 中，不会被统计，因此不开启
+if __name__ != '__main__' and os.environ.get("CIPHER_PROFILE", "") not in ("", "0"):
+    import profiler
+
+    profiler.enable_from_env()
 
 
 if __name__ == '__main__':
@@ -250,10 +822,21 @@ if __name__ == '__main__':
         recv_digest = decrypt(enc_digest, d, n)
         print("end decrypt")
 
+        key = RSAPrivateKey(p, q, e, d)
+        if key.encrypt(mess_digest) != enc_digest or key.decrypt(enc_digest) != recv_digest:
+            print("CRT 解密结果不一致")
+
         if mess_digest == recv_digest:
             print("签名成功")
             print("message: %s" % m)
         else:
             print("签名失败")
+
+        key = generate_keypair(2048)
+        digest_int = int(mess_digest, 16)
+        if key.decrypt_int(key.public_key().encrypt_int(digest_int)) == digest_int:
+            print("2048 位密钥加解密成功")
+        file_sig = sign_file(__file__, key)
+        print("文件签名：%s" % verify_file(__file__, file_sig, key.public_key(), use_mmap=True))
     else:
         print("p 或 q 为非素数")
@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time    : 10/18/2026 15:30
+# @Author  : YLD10
+# @Email   : yl1315348050@yahoo.com
+# @File    : benchmark.py
+# @Software: PyCharm
+"""
+性能基准测试
+
+覆盖 DES 加解密、RSA 加解密与密钥计算、素数判断、素数位图、整数分解以及 no_zero_num_first.deal，
+统计每秒操作数、每秒字节数和峰值内存，结果保存为 JSON。
+指定基准文件时与之比较，任一用例的每秒操作数下降超过容忍度即以非 0 状态退出。
+
+用法：
+    python benchmark.py -o result.json
+    python benchmark.py -b result.json -t 0.2
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import DES
+import RSA
+from factorize import factorize
+from no_zero_num_first import deal
+from prime import PrimeBitmap, isprime, isprime_many, prime_count, primes_in_range, write_bitmap
+
+DES_KEY = "12345678"
+DES_SIZES = (64, 1024, 16 * 1024)
+
+# RSA.py __main__ 中的演示参数
+RSA_P = 53
+RSA_Q = 61
+RSA_SIZES = (16, 64, 256)
+# 字节分组接口使用随机生成的密钥，同样位数的密钥耗时相近
+RSA_BITS = 1024
+RSA_BYTES_SIZES = (1024, 16 * 1024)
+# 比较同样位数的 n 下 2、3、4 个素数的私钥运算
+RSA_PRIME_COUNTS = (2, 3, 4)
+RSA_PRIME_BITS = 2048
+# 模梅森素数 2^2203 - 1 的逐个求逆与批量求逆
+INVERSE_MODULUS = (1 << 2203) - 1
+INVERSE_COUNT = 1000
+
+PRIMES = (97, 1000003, 1000000007, 1000000000039)
+# (lo, hi)：分段筛的区间，包括 10^12 附近的窗口
+SIEVE_RANGES = ((0, 10 ** 6), (10 ** 12, 10 ** 12 + 10 ** 6))
+PRIME_COUNTS = (10 ** 9, 10 ** 11)
+# isprime_many 的输入：从 10^12 起的连续整数
+MANY_SIZES = (10000,)
+DEAL_SIZES = (10000, 1000000)
+
+# 待分解的数：两个 30 位素数之积、两个 32 位素数之积、2^64 - 1
+FACTOR_NUMBERS = (1000000007 * 1000000009, 4294967279 * 4294967291, 2 ** 64 - 1)
+
+# 素数位图的上界与查询的数
+BITMAP_LIMIT = 10 ** 7
+BITMAP_QUERIES = (97, 1000003, 9999991)
+
+
+def des_cases():
+    for size in DES_SIZES:
+        message = "x" * size
+        cipher = DES.encrypt(message, DES_KEY)
+        yield "des.encrypt[%d]" % size, size, lambda m=message: DES.encrypt(m, DES_KEY)
+        yield "des.decrypt[%d]" % size, size, lambda c=cipher: DES.decrypt(c, DES_KEY)
+
+
+def rsa_cases():
+    n = RSA_P * RSA_Q
+    fn = (RSA_P - 1) * (RSA_Q - 1)
+    e = RSA.get_e(fn)
+    d = RSA.get_d(e, fn)
+    key = RSA.RSAPrivateKey(RSA_P, RSA_Q, e, d)
+    yield "rsa.get_e", None, lambda: RSA.get_e(fn)
+    yield "rsa.get_d", None, lambda: RSA.get_d(e, fn)
+    for size in RSA_SIZES:
+        message = "x" * size
+        cipher = RSA.encrypt(message, e, n)
+        yield "rsa.encrypt[%d]" % size, size, lambda m=message: RSA.encrypt(m, e, n)
+        yield "rsa.decrypt[%d]" % size, size, lambda c=cipher: RSA.decrypt(c, d, n)
+        yield "rsa.decrypt_crt[%d]" % size, size, lambda c=cipher: key.decrypt(c)
+
+    big = RSA.generate_keypair(RSA_BITS)
+    for size in RSA_BYTES_SIZES:
+        message = b"x" * size
+        cipher = big.encrypt_bytes(message)
+        yield "rsa%d.encrypt_bytes[%d]" % (RSA_BITS, size), size, lambda m=message: big.encrypt_bytes(m)
+        yield "rsa%d.decrypt_bytes[%d]" % (RSA_BITS, size), size, lambda c=cipher: big.decrypt_bytes(c)
+
+    values = [pow(3, i + 1, INVERSE_MODULUS) for i in range(INVERSE_COUNT)]
+    yield "rsa.mod_inverse[%d]" % INVERSE_COUNT, None, \
+        lambda: [RSA.mod_inverse(v, INVERSE_MODULUS) for v in values]
+    yield "rsa.batch_inverse[%d]" % INVERSE_COUNT, None, lambda: RSA.batch_inverse(values, INVERSE_MODULUS)
+
+    for count in RSA_PRIME_COUNTS:
+        key = RSA.generate_keypair(RSA_PRIME_BITS, primes=count)
+        c = key.encrypt_int(123456789)
+        yield "rsa%d.decrypt_int[%d primes]" % (RSA_PRIME_BITS, count), None, lambda k=key, v=c: k.decrypt_int(v)
+
+
+def prime_cases():
+    for num in PRIMES:
+        yield "prime.isprime[%d]" % num, None, lambda v=num: isprime(v)
+    for lo, hi in SIEVE_RANGES:
+        yield "prime.primes_in_range[%d,%d)" % (lo, hi), None, \
+            lambda a=lo, b=hi: sum(1 for _ in primes_in_range(a, b))
+    for size in MANY_SIZES:
+        values = list(range(10 ** 12, 10 ** 12 + size))
+        yield "prime.isprime_many[%d]" % size, None, lambda v=values: isprime_many(v)
+    for num in PRIME_COUNTS:
+        yield "prime.prime_count[%d]" % num, None, lambda v=num: prime_count(v)
+
+
+def factor_cases():
+    for num in FACTOR_NUMBERS:
+        yield "factorize[%d]" % num, None, lambda v=num: factorize(v)
+
+
+def bitmap_cases():
+    fd, path = tempfile.mkstemp(suffix=".bin")
+    os.close(fd)
+    try:
+        write_bitmap(path, BITMAP_LIMIT)
+        # 启动开销：打开并映射文件
+        yield "bitmap.load[%d]" % BITMAP_LIMIT, None, lambda: PrimeBitmap(path).close()
+        bitmap = PrimeBitmap(path)
+        try:
+            for num in BITMAP_QUERIES:
+                yield "bitmap.isprime[%d]" % num, None, lambda v=num: bitmap.isprime(v)
+        finally:
+            bitmap.close()
+    finally:
+        os.remove(path)
+
+
+def deal_cases():
+    for size in DEAL_SIZES:
+        # deal 原地修改数组，但重复调用时仍要遍历整个数组，工作量不变
+        arr = [0 if i % 3 == 0 else i for i in range(size)]
+        yield "no_zero_num_first.deal[%d]" % size, size * 8, lambda a=arr: deal(a)
+
+
+SUITES = {
+    "bitmap": bitmap_cases,
+    "des": des_cases,
+    "factor": factor_cases,
+    "rsa": rsa_cases,
+    "prime": prime_cases,
+    "deal": deal_cases,
+}
+
+
+def measure(func, nbytes=None, min_time=0.2, repeat=3):
+    """
+    测量单个用例
+    :param func: 无参数的被测函数
+    :param nbytes: 每次调用处理的字节数，None 表示不统计吞吐
+    :param min_time: 每轮的最短计时时长（秒）
+    :param repeat: 轮数，取最快的一轮
+    :return: 结果字典
+    """
+    # 先估算每轮需要调用的次数
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        cost = time.perf_counter() - start
+        if cost >= min_time / 10 or number >= 1 << 20:
+            break
+        number *= 10
+    number = max(1, int(number * min_time / max(cost, 1e-9)))
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        cost = (time.perf_counter() - start) / number
+        if best is None or cost < best:
+            best = cost
+
+    # 峰值内存单独测，避免 tracemalloc 影响计时
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    result = {"seconds_per_op": best, "ops_per_sec": 1.0 / best, "peak_memory": peak}
+    if nbytes is not None:
+        result["bytes_per_sec"] = nbytes / best
+    return result
+
+
+def run(suites=None, min_time=0.2, repeat=3, verbose=True):
+    """
+    :param suites: 要运行的套件名列表，None 时全部运行
+    :return: {"meta": ..., "results": {用例名: 结果字典}}
+    """
+    results = {}
+    for suite in suites or sorted(SUITES):
+        for name, nbytes, func in SUITES[suite]():
+            results[name] = measure(func, nbytes, min_time, repeat)
+            if verbose:
+                print(format_result(name, results[name]))
+    return {
+        "meta": {"python": platform.python_version(), "machine": platform.machine(),
+                 "time": time.strftime("%Y-%m-%d %H:%M:%S")},
+        "results": results,
+    }
+
+
+def format_result(name, result):
+    line = "%-36s %14.1f ops/s" % (name, result["ops_per_sec"])
+    if "bytes_per_sec" in result:
+        line += " %12.1f KB/s" % (result["bytes_per_sec"] / 1024)
+    else:
+        line += " " * 18
+    return line + " %10.1f KB peak" % (result["peak_memory"] / 1024)
+
+
+def compare(current, baseline, tolerance=0.2):
+    """
+    与基准结果比较
+    :param current: run 的返回值
+    :param baseline: 之前保存的 run 的返回值
+    :param tolerance: 允许的每秒操作数下降比例
+    :return: 性能回退的用例列表 [(用例名, 基准 ops/s, 当前 ops/s)]
+    """
+    regressions = []
+    for name, base in baseline["results"].items():
+        cur = current["results"].get(name)
+        if cur is None:
+            continue
+        if cur["ops_per_sec"] < base["ops_per_sec"] * (1 - tolerance):
+            regressions.append((name, base["ops_per_sec"], cur["ops_per_sec"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="性能基准测试")
+    parser.add_argument("-s", "--suite", action="append", choices=sorted(SUITES),
+                        help="只运行指定的套件，可重复指定")
+    parser.add_argument("-o", "--output", help="结果保存路径（JSON）")
+    parser.add_argument("-b", "--baseline", help="用于比较的基准结果路径（JSON）")
+    parser.add_argument("-t", "--tolerance", type=float, default=0.2,
+                        help="允许的性能下降比例，默认 0.2")
+    parser.add_argument("--min-time", type=float, default=0.2, help="每轮最短计时时长（秒）")
+    parser.add_argument("--repeat", type=int, default=3, help="每个用例的计时轮数")
+    args = parser.parse_args(argv)
+
+    current = run(args.suite, args.min_time, args.repeat)
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(current, fp, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline, "r") as fp:
+            baseline = json.load(fp)
+        regressions = compare(current, baseline, args.tolerance)
+        for name, base, cur in regressions:
+            print("性能回退：%s %.1f -> %.1f ops/s（%.1f%%）" % (name, base, cur, (cur / base - 1) * 100))
+        if regressions:
+            return 1
+        print("与基准相比没有超过 %.0f%% 的性能回退" % (args.tolerance * 100))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
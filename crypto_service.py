@@ -0,0 +1,355 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time    : 10/18/2026 17:30
+# @Author  : YLD10
+# @Email   : yl1315348050@yahoo.com
+# @File    : crypto_service.py
+# @Software: PyCharm
+"""
+基于 asyncio 的本地加解密服务
+
+通过 Unix 套接字或本机 TCP 提供 DES 与 RSA 加解密，协议为按行分隔的 JSON：
+    请求：{"id": 1, "op": "des_encrypt", "key": "12345678", "data": "世界你好"}
+          {"id": 2, "op": "rsa_encrypt", "key": [e, n], "data": "中文"}
+    响应：{"id": 1, "result": "..."} 或 {"id": 1, "error": "..."}
+    统计：{"id": 3, "op": "stats"}
+op 可以是 des_encrypt、des_decrypt、rsa_encrypt、rsa_decrypt、stats。
+
+并发的小请求先进入有界队列，由批处理协程按 batch_size 或 max_latency 凑成一批，
+交给进程池执行，事件循环本身从不执行加解密运算。
+队列满时读请求的协程会等待，不再读取套接字，压力由此传回客户端。
+单行请求超过 max_request_bytes 时整行被丢弃，并回复 {"id": null, "error": ...}，连接保持可用。
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import DES
+import RSA
+
+
+# 单行请求的默认上限（字节），asyncio 自带的 64 KiB 对批量数据偏小
+MAX_REQUEST_BYTES = 16 * 1024 * 1024
+
+
+async def read_request(reader):
+    """
+    读取一行请求，超长的行会被读完并丢弃
+    :param reader: asyncio.StreamReader，其 limit 即单行上限
+    :return: (行数据, 是否超长)，连接关闭时行数据为 b""
+    """
+    oversized = False
+    while True:
+        try:
+            line = await reader.readuntil(b"\n")
+        except asyncio.IncompleteReadError as ex:
+            line = ex.partial
+        except asyncio.LimitOverrunError as ex:
+            # 丢弃缓冲区中已经确认属于这一行的部分，继续寻找行尾
+            oversized = True
+            await reader.readexactly(ex.consumed)
+            continue
+        return (b"" if oversized else line), oversized
+
+
+# 加解密操作名，另有不进入批处理的 stats
+OPS = ("des_encrypt", "des_decrypt", "rsa_encrypt", "rsa_decrypt")
+
+
+def check_request(request):
+    """
+    检查请求的字段，不合法时抛出 ValueError
+    :param request: 解析后的请求
+    """
+    if not isinstance(request, dict):
+        raise ValueError("请求必须是 JSON 对象")
+    op = request.get("op")
+    if op == "stats":
+        return
+    if op not in OPS:
+        raise ValueError("未知的操作：%s" % op)
+    key = request.get("key")
+    if not isinstance(request.get("data"), str):
+        raise ValueError("data 必须是字符串")
+    if op.startswith("des_"):
+        if not isinstance(key, str):
+            raise ValueError("DES 的 key 必须是字符串")
+    elif not (isinstance(key, list) and len(key) == 2 and
+              all(isinstance(v, int) and not isinstance(v, bool) for v in key)):
+        raise ValueError("RSA 的 key 必须是两个整数组成的数组")
+
+
+def run_one(op, key, data):
+    """
+    执行单个加解密请求
+    :param op: 操作名
+    :param key: DES 为密钥文本；RSA 为 [e, n] 或 [d, n]
+    :param data: 明文或密文
+    :return: 结果字符串
+    """
+    if op == "des_encrypt":
+        return DES.encrypt(data, key)
+    if op == "des_decrypt":
+        return DES.decrypt(data, key)
+    if op == "rsa_encrypt":
+        return RSA.encrypt(data, int(key[0]), int(key[1]))
+    if op == "rsa_decrypt":
+        return RSA.decrypt(data, int(key[0]), int(key[1]))
+    raise ValueError("未知的操作：%s" % op)
+
+
+def run_batch(items):
+    """
+    在工作进程中执行一批请求
+    :param items: [(op, key, data), ...]
+    :return: [(是否成功, 结果或错误信息), ...]，与 items 一一对应
+    """
+    results = []
+    for op, key, data in items:
+        try:
+            results.append((True, run_one(op, key, data)))
+        except Exception as ex:
+            results.append((False, "%s: %s" % (type(ex).__name__, ex)))
+    return results
+
+
+class LatencyStats(object):
+    """
+    保存最近若干次请求的延迟，计算分位数
+    """
+
+    def __init__(self, size=10000):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.errors = 0
+
+    def add(self, latency, ok=True):
+        self.samples.append(latency)
+        self.count += 1
+        if not ok:
+            self.errors += 1
+
+    def percentile(self, p):
+        """
+        :param p: 0~100 的百分位
+        :return: 延迟（秒），没有样本时为 0
+        """
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def to_dict(self):
+        return {"count": self.count, "errors": self.errors,
+                "p50_ms": self.percentile(50) * 1e3, "p99_ms": self.percentile(99) * 1e3}
+
+
+class CryptoService(object):
+    """
+    批处理加解密服务
+    """
+
+    def __init__(self, batch_size=64, max_latency=0.005, queue_size=4096, workers=None,
+                 max_request_bytes=MAX_REQUEST_BYTES):
+        """
+        :param batch_size: 每批最多的请求数
+        :param max_latency: 凑批时最多等待的时间（秒）
+        :param queue_size: 待处理请求队列的容量，满时对客户端施加背压
+        :param workers: 进程数，None 时为 CPU 核数
+        :param max_request_bytes: 单行请求的最大字节数
+        """
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self.queue_size = queue_size
+        self.workers = workers or os.cpu_count() or 1
+        self.max_request_bytes = max_request_bytes
+        self.stats = LatencyStats()
+        self.batches = 0
+        self.queue = None
+        self.pool = None
+        self._batcher = None
+        self._inflight = None
+        self._slots = None
+
+    async def start(self):
+        self.queue = asyncio.Queue(self.queue_size)
+        # fork 出的工作进程会继承当时已接受的连接套接字，服务端关闭连接后客户端收不到 EOF；
+        # forkserver 从一个干净的进程派生工作进程，不会继承这些描述符
+        context = None
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+        self.pool = ProcessPoolExecutor(self.workers, mp_context=context)
+        # 同时在进程池中执行的批数，超过后批处理协程等待，队列随之积压
+        self._inflight = asyncio.Semaphore(self.workers * 2)
+        # 所有连接上未完成的请求总数不超过队列容量
+        self._slots = asyncio.Semaphore(self.queue_size)
+        self._batcher = asyncio.ensure_future(self._batch_loop())
+
+    async def close(self):
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+
+    async def submit(self, op, key, data):
+        """
+        提交一个请求并等待结果
+        :return: 结果字符串，失败时抛出 RuntimeError
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((op, key, data, future))
+        ok, result = await future
+        if not ok:
+            raise RuntimeError(result)
+        return result
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_latency
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._inflight.acquire()
+            self.batches += 1
+            asyncio.ensure_future(self._run_batch(batch))
+
+    async def _run_batch(self, batch):
+        loop = asyncio.get_running_loop()
+        try:
+            items = [(op, key, data) for op, key, data, _ in batch]
+            try:
+                results = await loop.run_in_executor(self.pool, run_batch, items)
+            except Exception as ex:
+                results = [(False, "%s: %s" % (type(ex).__name__, ex))] * len(batch)
+            for (_, _, _, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._inflight.release()
+
+    async def handle_request(self, request):
+        """
+        :param request: 解析后的请求字典
+        :return: 响应字典
+        """
+        response = {"id": request.get("id")}
+        if request.get("op") == "stats":
+            response["result"] = dict(self.stats.to_dict(), batches=self.batches,
+                                      queued=self.queue.qsize())
+            return response
+        start = time.perf_counter()
+        try:
+            response["result"] = await self.submit(request.get("op"), request.get("key"), request.get("data"))
+            ok = True
+        except Exception as ex:
+            response["error"] = str(ex)
+            ok = False
+        self.stats.add(time.perf_counter() - start, ok)
+        return response
+
+    async def handle_connection(self, reader, writer):
+        """
+        每个请求单独起一个协程处理，响应按完成顺序写回，客户端用 id 对应
+        """
+        lock = asyncio.Lock()
+        tasks = set()
+
+        async def send(response):
+            async with lock:
+                writer.write((json.dumps(response, ensure_ascii=False) + "\n").encode("UTF-8"))
+                await writer.drain()
+
+        async def respond(line):
+            try:
+                try:
+                    request = json.loads(line)
+                    check_request(request)
+                    response = await self.handle_request(request)
+                except (ValueError, AttributeError) as ex:
+                    response = {"id": None, "error": "请求格式错误：%s" % ex}
+                await send(response)
+            finally:
+                self._slots.release()
+
+        try:
+            while True:
+                line, oversized = await read_request(reader)
+                if oversized:
+                    await send({"id": None, "error": "请求超过 %d 字节的上限" % self.max_request_bytes})
+                    continue
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                # 未完成的请求达到上限时先等待，不再继续读取套接字
+                await self._slots.acquire()
+                task = asyncio.ensure_future(respond(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            writer.close()
+
+
+async def serve(service, host="127.0.0.1", port=8765, unix_path=None):
+    """
+    启动服务直到被取消
+    :param service: CryptoService
+    :param host: TCP 监听地址，只应使用本机地址
+    :param port: TCP 端口
+    :param unix_path: Unix 套接字路径，指定时不监听 TCP
+    """
+    await service.start()
+    if unix_path:
+        server = await asyncio.start_unix_server(service.handle_connection, unix_path,
+                                                 limit=service.max_request_bytes)
+    else:
+        server = await asyncio.start_server(service.handle_connection, host, port,
+                                            limit=service.max_request_bytes)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="本地 DES/RSA 加解密服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="Unix 套接字路径")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--max-latency", type=float, default=0.005, help="凑批最长等待时间（秒）")
+    parser.add_argument("--queue-size", type=int, default=4096)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-request-bytes", type=int, default=MAX_REQUEST_BYTES, help="单行请求的最大字节数")
+    args = parser.parse_args(argv)
+
+    service = CryptoService(args.batch_size, args.max_latency, args.queue_size, args.workers,
+                            args.max_request_bytes)
+    try:
+        asyncio.run(serve(service, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time    : 10/18/2026 11:05
+# @Author  : YLD10
+# @Email   : yl1315348050@yahoo.com
+# @File    : des_bitslice.py
+# @Software: PyCharm
+"""
+基于 NumPy 的位切片（bitslice）批量 DES
+
+把 N 个 64 位分组转置成 64 条“通道”，第 i 条通道按位打包了所有分组的第 i+1 位，
+每个 uint64 字同时承载 64 个分组。这样：
+  置换（IP、E、P、FP）只是通道的重新排列；
+  与子密钥异或只是把子密钥为 1 的通道取反；
+  S 盒用布尔电路（多路选择树）同时计算所有分组。
+16 轮迭代因此变成对整批分组的向量运算，结果与 DES.encrypt 逐字节一致。
+"""
+import numpy as np
+
+from DES import (DESCipher, IP_TABLE, FP_TABLE, E_TABLE, P_TABLE, SBOXES,
+                 padding_bytes, unpadding_bytes)
+
+# 每批转置的分组数，控制中间数组大小
+BATCH_BLOCKS = 1 << 16
+
+ALL_ONES = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+IP_INDEX = np.array(IP_TABLE) - 1
+FP_INDEX = np.array(FP_TABLE) - 1
+E_INDEX = np.array(E_TABLE) - 1
+P_INDEX = np.array(P_TABLE) - 1
+
+
+def build_leaf_codes():
+    """
+    把每个 S 盒拆成 16 组，每组是关于第 5、6 位输入的 2 元布尔函数
+    :return: (8, 16, 4) 的数组，值为 2 元布尔函数的真值表编号（0~15）
+    """
+    codes = np.zeros((8, 16, 4), dtype=np.intp)
+    for k, box in enumerate(SBOXES):
+        for six in range(64):
+            row = ((six >> 4) & 0b10) | (six & 1)
+            col = (six >> 1) & 0b1111
+            value = box[row * 16 + col]
+            for j in range(4):
+                if (value >> (3 - j)) & 1:
+                    codes[k, six >> 2, j] |= 1 << (six & 0b11)
+
+    return codes
+
+
+LEAF_CODES = build_leaf_codes()
+SBOX_INDEX = np.arange(8)[:, None, None]
+
+
+def sbox_layer(x):
+    """
+    位切片 S 盒，8 个 S 盒同时计算
+    :param x: (8, 6, L) 的通道数组，x[k, m] 为第 k 个 S 盒的第 m+1 位输入
+    :return: (32, L) 的通道数组，即 S 盒压缩后的 32 位
+    """
+    b5 = x[:, 4]
+    b6 = x[:, 5]
+    nb5 = ~b5
+    nb6 = ~b6
+    # 关于 (b5, b6) 的 4 个最小项，下标为 (b5 << 1) | b6
+    minterms = (nb5 & nb6, nb5 & b6, b5 & nb6, b5 & b6)
+    funcs = np.empty((16,) + b5.shape, dtype=np.uint64)
+    funcs[0] = 0
+    for t in range(1, 16):
+        low = t & -t
+        funcs[t] = funcs[t ^ low] ^ minterms[low.bit_length() - 1]
+
+    # (8, 16, 4, L)：每个 S 盒 16 组、每组 4 个输出位
+    v = funcs[LEAF_CODES, SBOX_INDEX]
+    # 依次以第 4、3、2、1 位为选择信号合并成一组
+    for m in (3, 2, 1, 0):
+        sel = x[:, m][:, None, None, :]
+        a = v[:, 0::2]
+        v = a ^ ((a ^ v[:, 1::2]) & sel)
+
+    return v.reshape(32, -1)
+
+
+def feistel(half, key_mask):
+    """
+    位切片的轮函数：扩展置换、与子密钥异或、S 盒、P 置换
+    :param half: (32, L) 的通道数组
+    :param key_mask: (48, 1) 的子密钥掩码，子密钥为 1 的位是全 1
+    :return: (32, L) 的通道数组
+    """
+    x = half[E_INDEX] ^ key_mask
+    return sbox_layer(x.reshape(8, 6, -1))[P_INDEX]
+
+
+def key_masks(key):
+    """
+    :param key: DESCipher 对象或密钥文本字符串
+    :return: 16 个 (48, 1) 的子密钥掩码
+    """
+    if isinstance(key, str):
+        key = DESCipher(key)
+    masks = []
+    for key_bin_48 in key.subkeys:
+        bits = np.frombuffer(key_bin_48.encode("ascii"), dtype=np.uint8) - ord("0")
+        masks.append((bits.astype(np.uint64) * ALL_ONES)[:, None])
+    return masks
+
+
+def to_lanes(blocks):
+    """
+    分组转置为通道
+    :param blocks: 长度为 64 的整数倍的 uint64 数组
+    :return: (64, len(blocks) // 64) 的通道数组
+    """
+    bits = np.unpackbits(blocks.astype(">u8").view(np.uint8).reshape(-1, 8), axis=1)
+    return np.ascontiguousarray(np.packbits(bits.T, axis=1)).view(np.uint64)
+
+
+def from_lanes(lanes):
+    """
+    通道转置回分组
+    :param lanes: (64, L) 的通道数组
+    :return: 长度为 64 * L 的 uint64 数组
+    """
+    bits = np.unpackbits(lanes.view(np.uint8), axis=1)
+    return np.ascontiguousarray(np.packbits(bits.T, axis=1)).view(">u8").ravel().astype(np.uint64)
+
+
+def crypt_blocks(blocks, masks, decrypt):
+    """
+    批量加密或解密
+    :param blocks: uint64 数组
+    :param masks: key_masks 生成的子密钥掩码
+    :param decrypt: 为 True 时解密
+    :return: uint64 数组
+    """
+    blocks = np.asarray(blocks, dtype=np.uint64).ravel()
+    n = len(blocks)
+    out = np.empty(n, dtype=np.uint64)
+    for start in range(0, n, BATCH_BLOCKS):
+        batch = blocks[start:start + BATCH_BLOCKS]
+        m = len(batch)
+        if m % 64:
+            batch = np.concatenate((batch, np.zeros(64 - m % 64, dtype=np.uint64)))
+        lanes = to_lanes(batch)[IP_INDEX]
+        left = lanes[:32]
+        right = lanes[32:]
+        if decrypt:
+            for key_mask in reversed(masks):
+                left, right = right ^ feistel(left, key_mask), left
+        else:
+            for key_mask in masks:
+                left, right = right, left ^ feistel(right, key_mask)
+        out[start:start + m] = from_lanes(np.concatenate((left, right))[FP_INDEX])[:m]
+
+    return out
+
+
+def encrypt_blocks(blocks, key):
+    """
+    批量 ECB 加密
+    :param blocks: N 个 64 位分组（可转换为 uint64 数组的对象）
+    :param key: DESCipher 对象或密钥文本字符串
+    :return: N 个 64 位密文分组的 uint64 数组
+    """
+    return crypt_blocks(blocks, key_masks(key), False)
+
+
+def decrypt_blocks(blocks, key):
+    """
+    批量 ECB 解密
+    :param blocks: N 个 64 位分组（可转换为 uint64 数组的对象）
+    :param key: DESCipher 对象或密钥文本字符串
+    :return: N 个 64 位明文分组的 uint64 数组
+    """
+    return crypt_blocks(blocks, key_masks(key), True)
+
+
+def ctr_xor(key, counter, data):
+    """
+    批量 CTR 运算，与 des_mode.ctr_xor 结果一致
+    :param key: DESCipher 对象或密钥文本字符串
+    :param counter: 第一个分组使用的 64 位计数器值
+    :param data: 任意长度的字节数据
+    :return: 异或结果字节
+    """
+    data = np.frombuffer(data, dtype=np.uint8)
+    n = len(data)
+    blocks = (n + 7) // 8
+    counters = np.arange(blocks, dtype=np.uint64) + np.uint64(counter)
+    stream = encrypt_blocks(counters, key).astype(">u8").view(np.uint8)
+    return (data ^ stream[:n]).tobytes()
+
+
+def encrypt(enc_str, key_str):
+    """
+    批量实现的 DES 加密主函数，与 DES.encrypt 输出相同
+    :param enc_str: 待加密的文本
+    :param key_str: 密钥文本字符串
+    :return: 加密后的 16 进制格式字符串
+    """
+    data = padding_bytes(str(enc_str).encode("UTF-8"))
+    blocks = np.frombuffer(data, dtype=">u8")
+    return encrypt_blocks(blocks, key_str).astype(">u8").tobytes().hex()
+
+
+def decrypt(dec_str, key_str):
+    """
+    批量实现的 DES 解密主函数，与 DES.decrypt 输出相同
+    :param dec_str: 待解密的 16 进制字符串
+    :param key_str: 密钥文本字符串
+    :return: 解密后的明文文本字符串
+    """
+    blocks = np.frombuffer(bytes.fromhex(dec_str), dtype=">u8")
+    data = decrypt_blocks(blocks, key_str).astype(">u8").tobytes()
+    return unpadding_bytes(data).decode("UTF-8")
+
+
+if __name__ == '__main__':
+    import time
+    import DES
+
+    message = "世界你好" * 100000
+    key = "12345678"
+
+    start = time.perf_counter()
+    c = encrypt(message, key)
+    cost = time.perf_counter() - start
+    print("批量加密 %d 字节：%.3f s，%.2f MB/s" % (len(c) // 2, cost, len(c) / 2 / cost / 1e6))
+    print("与 DES.encrypt 一致：%s" % (c[:4096] == DES.encrypt(message[:1000], key)[:4096]))
+    print("解密正确：%s" % (decrypt(c, key) == message))
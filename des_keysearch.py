@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time    : 10/18/2026 14:20
+# @Author  : YLD10
+# @Email   : yl1315348050@yahoo.com
+# @File    : des_keysearch.py
+# @Software: PyCharm
+"""
+受限密钥空间下的 DES 已知明文密钥搜索（用于 CTF 与审计练习）
+
+密钥空间由固定前缀和若干个取自同一字符集的可变位组成，例如全数字的 8 位密钥。
+候选密钥按下标惰性生成，整个空间切成若干段交给进程池搜索，
+完成的段记录在检查点文件中，中断后可以从检查点继续。
+密钥中不参与子密钥生成的位（校验位等）不影响结果，所以找到的可能是与原密钥等价的另一个密钥。
+"""
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from DES import encrypt_round_int, get_displace, init_subkeys_int, key2bytes
+
+CHUNK_KEYS = 1 << 16
+
+
+class KeySpace(object):
+    """
+    候选密钥空间：prefix + 取自 charset 的 length 个字节
+    """
+
+    def __init__(self, charset, length=None, prefix=b""):
+        """
+        :param charset: 可变位的字符集，字符串或字节串
+        :param length: 可变位的个数，None 时为 8 - len(prefix)
+        :param prefix: 固定的密钥前缀
+        """
+        if isinstance(charset, str):
+            charset = charset.encode("UTF-8")
+        if isinstance(prefix, str):
+            prefix = prefix.encode("UTF-8")
+        if length is None:
+            length = 8 - len(prefix)
+        if len(prefix) + length != 8:
+            raise ValueError("前缀与可变位的总长度必须是 8 字节")
+        if len(set(charset)) != len(charset) or len(charset) == 0:
+            raise ValueError("字符集不能为空且不能有重复字符")
+        self.charset = bytes(charset)
+        self.length = length
+        self.prefix = bytes(prefix)
+        self.size = len(self.charset) ** length
+
+    def key_at(self, index):
+        """
+        :param index: 候选密钥的下标
+        :return: 8 字节的密钥
+        """
+        base = len(self.charset)
+        tail = bytearray(self.length)
+        for i in range(self.length - 1, -1, -1):
+            index, digit = divmod(index, base)
+            tail[i] = self.charset[digit]
+        return self.prefix + bytes(tail)
+
+    def iter_keys(self, start=0, stop=None):
+        """
+        惰性枚举下标在 [start, stop) 内的候选密钥
+        :return: 64 位整数密钥的生成器
+        """
+        if stop is None or stop > self.size:
+            stop = self.size
+        if start >= stop:
+            return
+        base = len(self.charset)
+        charset = self.charset
+        prefix_int = int.from_bytes(self.prefix, "big") << (8 * self.length)
+        digits = []
+        index = start
+        for i in range(self.length):
+            index, digit = divmod(index, base)
+            digits.append(digit)
+        # digits[0] 对应密钥最后一个字节，weights 为各位在整数密钥中的权重
+        weights = [1 << (8 * i) for i in range(self.length)]
+        key = prefix_int + sum(charset[d] * w for d, w in zip(digits, weights))
+        for _ in range(stop - start):
+            yield key
+            # 里程表式进位，只修改变化的那几个字节
+            for i in range(self.length):
+                d = digits[i]
+                if d + 1 < base:
+                    digits[i] = d + 1
+                    key += (charset[d + 1] - charset[d]) * weights[i]
+                    break
+                digits[i] = 0
+                key += (charset[0] - charset[d]) * weights[i]
+
+    def to_dict(self):
+        return {"charset": self.charset.hex(), "length": self.length, "prefix": self.prefix.hex()}
+
+
+def search_range(plain, cipher, keyspace, start, stop):
+    """
+    在下标 [start, stop) 内搜索满足 E_k(plain) == cipher 的密钥
+    :param plain: 64 位整数明文块
+    :param cipher: 64 位整数密文块
+    :param keyspace: KeySpace
+    :return: (找到的 8 字节密钥或 None, 实际测试的密钥数)
+    """
+    # 明文的初始置换与密文的逆末置换只与已知明密文有关，提前算好；
+    # 比较迭代结果与 IP(cipher) 即可省掉每个候选密钥的末置换
+    block = get_displace("IP")(plain)
+    target = get_displace("IP")(cipher)
+    target_left = target >> 32
+
+    tested = 0
+    for key in keyspace.iter_keys(start, stop):
+        tested += 1
+        subkeys_int = init_subkeys_int(key)
+        state = encrypt_round_int(block, subkeys_int[:15])
+        # 第 16 轮结束后左半部分就是第 15 轮的右半部分，不相等可提前淘汰
+        if state & 0xFFFFFFFF != target_left:
+            continue
+        if encrypt_round_int(state, subkeys_int[15:]) == target:
+            return key.to_bytes(8, "big"), tested
+
+    return None, tested
+
+
+# 工作进程中的搜索参数，由 init_search_worker 在进程启动时设置一次
+worker_args = None
+
+
+def init_search_worker(plain, cipher, keyspace):
+    global worker_args
+    worker_args = (plain, cipher, keyspace)
+
+
+def search_chunk(chunk_id, chunk_keys):
+    """
+    :return: (段号, 找到的密钥或 None, 测试的密钥数)
+    """
+    plain, cipher, keyspace = worker_args
+    start = chunk_id * chunk_keys
+    key, tested = search_range(plain, cipher, keyspace, start, start + chunk_keys)
+    return chunk_id, key, tested
+
+
+def as_block(block):
+    """
+    :param block: 8 字节的字节串或 64 位整数
+    :return: 64 位整数
+    """
+    if isinstance(block, int):
+        return block
+    return int.from_bytes(key2bytes(block), "big")
+
+
+def load_checkpoint(path, meta):
+    """
+    :return: (已完成的段号集合, 已找到的密钥或 None)；检查点不存在时为 (空集合, None)
+    """
+    if path is None or not os.path.exists(path):
+        return set(), None
+    with open(path, "r") as fp:
+        data = json.load(fp)
+    if data.get("meta") != meta:
+        raise ValueError("检查点与本次搜索的参数不一致")
+    found = data.get("found")
+    return set(data["done"]), found and bytes.fromhex(found)
+
+
+def save_checkpoint(path, meta, done, found=None):
+    """
+    先写临时文件再替换，避免中断时留下不完整的检查点
+    """
+    tmp = path + ".tmp"
+    with open(tmp, "w") as fp:
+        json.dump({"meta": meta, "done": sorted(done), "found": found}, fp)
+    os.replace(tmp, path)
+
+
+def search(plain, cipher, keyspace, workers=None, chunk_keys=CHUNK_KEYS,
+           checkpoint=None, progress=None):
+    """
+    多进程已知明文密钥搜索
+    :param plain: 已知明文块，8 字节或 64 位整数
+    :param cipher: 对应的密文块，8 字节或 64 位整数
+    :param keyspace: KeySpace
+    :param workers: 进程数，None 时为 CPU 核数
+    :param chunk_keys: 每个任务搜索的密钥数
+    :param checkpoint: 检查点文件路径，None 时不保存
+    :param progress: 进度回调 progress(done_keys, total_keys, keys_per_second)
+    :return: 找到的 8 字节密钥（可能是等价密钥）或 None
+    """
+    plain = as_block(plain)
+    cipher = as_block(cipher)
+    workers = workers or os.cpu_count() or 1
+    chunks = (keyspace.size + chunk_keys - 1) // chunk_keys
+    meta = {"plain": "%016x" % plain, "cipher": "%016x" % cipher,
+            "keyspace": keyspace.to_dict(), "chunk_keys": chunk_keys}
+    done, found = load_checkpoint(checkpoint, meta)
+    if found is not None:
+        return found
+    todo = iter([i for i in range(chunks) if i not in done])
+    done_keys = min(len(done) * chunk_keys, keyspace.size)
+    tested = 0
+    start_time = time.perf_counter()
+
+    with ProcessPoolExecutor(workers, initializer=init_search_worker,
+                             initargs=(plain, cipher, keyspace)) as pool:
+        running = set()
+        for chunk_id in todo:
+            running.add(pool.submit(search_chunk, chunk_id, chunk_keys))
+            if len(running) >= workers * 2:
+                break
+        while running:
+            finished, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                chunk_id, key, count = future.result()
+                done.add(chunk_id)
+                tested += count
+                done_keys += count
+                if key is not None:
+                    found = key
+            if checkpoint is not None:
+                save_checkpoint(checkpoint, meta, done, found and found.hex())
+            if progress is not None:
+                cost = time.perf_counter() - start_time
+                progress(done_keys, keyspace.size, tested / cost if cost > 0 else 0.0)
+            if found is not None:
+                for future in running:
+                    future.cancel()
+                break
+            for chunk_id in todo:
+                running.add(pool.submit(search_chunk, chunk_id, chunk_keys))
+                if len(running) >= workers * 2:
+                    break
+
+    return found
+
+
+def benchmark(keyspace, seconds=2.0):
+    """
+    单进程搜索速度基准
+    :param keyspace: KeySpace
+    :param seconds: 大致的测试时长
+    :return: 每秒测试的密钥数
+    """
+    # 用一个不在空间内的明密文对，保证测满整个区间
+    plain = 0
+    cipher = 0xFFFFFFFFFFFFFFFF
+    batch = 1000
+    tested = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        begin = tested % max(keyspace.size - batch, 1)
+        tested += search_range(plain, cipher, keyspace, begin, begin + batch)[1]
+    return tested / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    from DES import DESCipher
+
+    secret = b"12345678"
+    known_plain = b"worldhi!"
+    known_cipher = DESCipher(secret).ecb_encrypt(known_plain)
+
+    # 只有最后 4 位未知的数字密钥
+    space = KeySpace(b"0123456789", prefix=b"1234")
+    print("单进程速度：%.0f keys/s" % benchmark(space, 1.0))
+
+    def report(done_keys, total_keys, rate):
+        print("进度 %d/%d，%.0f keys/s" % (done_keys, total_keys, rate))
+
+    result = search(known_plain, known_cipher, space, chunk_keys=2000, progress=report)
+    print("找到密钥：%s，加密结果一致：%s" % (result, DESCipher(result).ecb_encrypt(known_plain) == known_cipher))
@@ -0,0 +1,331 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time    : 10/18/2026 10:12
+# @Author  : YLD10
+# @Email   : yl1315348050@yahoo.com
+# @File    : des_mode.py
+# @Software: PyCharm
+"""
+DES 的 CBC 与 CTR 分组模式
+
+数据按固定大小的块从文件或类文件对象中读入，处理完立即写出，
+因此占用的内存只与块大小有关，与输入总长度无关。
+每个 64 位分组都交给 DESCipher.encrypt_block/decrypt_block，
+即初始置换 -> 16 轮迭代 -> 末置换的整数流水线。
+CTR 模式的分组之间互不依赖，另提供按计数器边界分段、交给进程池并行处理的版本。
+"""
+import mmap
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from DES import DESCipher, pkcs7_padding, pkcs7_unpadding
+
+BLOCK_SIZE = 8
+CHUNK_SIZE = 64 * 1024
+SEGMENT_SIZE = 1024 * 1024
+MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+
+@contextmanager
+def open_stream(f, mode):
+    """
+    路径则打开文件，类文件对象则原样返回且不负责关闭
+    :param f: 文件路径或类文件对象
+    :param mode: 打开模式
+    """
+    if isinstance(f, (str, bytes, os.PathLike)):
+        with open(f, mode) as fp:
+            yield fp
+    else:
+        yield f
+
+
+def read_chunks(fp, chunk_size):
+    """
+    按块读取，除最后一块外每块长度都是 chunk_size
+    :param fp: 类文件对象
+    :param chunk_size: 块大小
+    :return: 字节块的生成器
+    """
+    while True:
+        chunk = fp.read(chunk_size)
+        if not chunk:
+            return
+        # 管道、套接字等对象可能返回不足 chunk_size 的数据，补齐以保证分组对齐
+        while len(chunk) < chunk_size:
+            more = fp.read(chunk_size - len(chunk))
+            if not more:
+                break
+            chunk += more
+        yield chunk
+
+
+def as_cipher(key):
+    """
+    :param key: DESCipher 等提供 encrypt_block/decrypt_block 的对象，或密钥文本字符串
+    :return: 加解密对象
+    """
+    if isinstance(key, str):
+        return DESCipher(key)
+    return key
+
+
+def check_iv(iv):
+    """
+    :param iv: 8 字节的初始向量，None 时随机生成
+    :return: 8 字节初始向量
+    """
+    if iv is None:
+        return os.urandom(BLOCK_SIZE)
+    iv = bytes(iv)
+    if len(iv) != BLOCK_SIZE:
+        raise ValueError("初始向量必须是 8 字节")
+    return iv
+
+
+def cbc_encrypt_chunk(cipher, chunk, prev):
+    """
+    CBC 加密一段长度为 8 的整数倍的数据
+    :param cipher: 加解密对象
+    :param chunk: 明文字节
+    :param prev: 上一个密文分组（整数）
+    :return: (密文字节, 最后一个密文分组)
+    """
+    encrypt_block = cipher.encrypt_block
+    out = bytearray(len(chunk))
+    for i in range(0, len(chunk), BLOCK_SIZE):
+        prev = encrypt_block(int.from_bytes(chunk[i:i + BLOCK_SIZE], "big") ^ prev)
+        out[i:i + BLOCK_SIZE] = prev.to_bytes(BLOCK_SIZE, "big")
+    return out, prev
+
+
+def cbc_decrypt_chunk(cipher, chunk, prev):
+    """
+    CBC 解密一段长度为 8 的整数倍的数据
+    :param cipher: 加解密对象
+    :param chunk: 密文字节
+    :param prev: 上一个密文分组（整数）
+    :return: (明文字节, 最后一个密文分组)
+    """
+    decrypt_block = cipher.decrypt_block
+    out = bytearray(len(chunk))
+    for i in range(0, len(chunk), BLOCK_SIZE):
+        block = int.from_bytes(chunk[i:i + BLOCK_SIZE], "big")
+        out[i:i + BLOCK_SIZE] = (decrypt_block(block) ^ prev).to_bytes(BLOCK_SIZE, "big")
+        prev = block
+    return out, prev
+
+
+def ctr_xor(cipher, counter, data):
+    """
+    用从 counter 开始的计数器分组生成密钥流，与 data 异或
+    :param cipher: 加解密对象
+    :param counter: 第一个分组使用的 64 位计数器值
+    :param data: 任意长度的字节数据
+    :return: 异或结果字节
+    """
+    n = len(data)
+    if n == 0:
+        return b""
+    encrypt_block = cipher.encrypt_block
+    blocks = (n + BLOCK_SIZE - 1) // BLOCK_SIZE
+    stream = bytearray(blocks * BLOCK_SIZE)
+    for i in range(blocks):
+        stream[i * BLOCK_SIZE:(i + 1) * BLOCK_SIZE] = \
+            encrypt_block((counter + i) & MASK_64).to_bytes(BLOCK_SIZE, "big")
+    # 整段转成大整数做一次异或，比逐字节异或快得多
+    ks = int.from_bytes(stream[:n], "big")
+    return (int.from_bytes(data, "big") ^ ks).to_bytes(n, "big")
+
+
+def cbc_encrypt(key, src, dst, iv=None, chunk_size=CHUNK_SIZE):
+    """
+    CBC 模式流式加密，末尾做 PKCS#7 填充
+    :param key: DESCipher 对象或密钥文本字符串
+    :param src: 明文文件路径或类文件对象
+    :param dst: 密文文件路径或类文件对象
+    :param iv: 8 字节初始向量，None 时随机生成
+    :param chunk_size: 每次读取的字节数，会向下取整为 8 的倍数
+    :return: 使用的初始向量
+    """
+    cipher = as_cipher(key)
+    iv = check_iv(iv)
+    chunk_size = max(BLOCK_SIZE, chunk_size - chunk_size % BLOCK_SIZE)
+    prev = int.from_bytes(iv, "big")
+    tail = b""
+    with open_stream(src, "rb") as fin, open_stream(dst, "wb") as fout:
+        for chunk in read_chunks(fin, chunk_size):
+            if len(chunk) < chunk_size:
+                # 最后一块不足 chunk_size，留给填充处理
+                tail = chunk
+                break
+            out, prev = cbc_encrypt_chunk(cipher, chunk, prev)
+            fout.write(out)
+        out, prev = cbc_encrypt_chunk(cipher, pkcs7_padding(tail), prev)
+        fout.write(out)
+
+    return iv
+
+
+def cbc_decrypt(key, src, dst, iv, chunk_size=CHUNK_SIZE):
+    """
+    CBC 模式流式解密，并去除 PKCS#7 填充
+    :param key: DESCipher 对象或密钥文本字符串
+    :param src: 密文文件路径或类文件对象
+    :param dst: 明文文件路径或类文件对象
+    :param iv: 加密时使用的 8 字节初始向量
+    :param chunk_size: 每次读取的字节数，会向下取整为 8 的倍数
+    """
+    cipher = as_cipher(key)
+    iv = check_iv(iv)
+    chunk_size = max(BLOCK_SIZE, chunk_size - chunk_size % BLOCK_SIZE)
+    prev = int.from_bytes(iv, "big")
+    # 始终保留最后一个明文分组，读到结尾后才能去除填充
+    pending = b""
+    with open_stream(src, "rb") as fin, open_stream(dst, "wb") as fout:
+        for chunk in read_chunks(fin, chunk_size):
+            if len(chunk) % BLOCK_SIZE != 0:
+                raise ValueError("密文长度必须是 8 的整数倍")
+            out, prev = cbc_decrypt_chunk(cipher, chunk, prev)
+            fout.write(pending)
+            pending = bytes(out[-BLOCK_SIZE:])
+            fout.write(out[:-BLOCK_SIZE])
+        fout.write(pkcs7_unpadding(pending))
+
+
+def ctr_encrypt(key, src, dst, iv=None, chunk_size=CHUNK_SIZE):
+    """
+    CTR 模式流式加密，不需要填充，密文与明文等长
+    :param key: DESCipher 对象或密钥文本字符串
+    :param src: 明文文件路径或类文件对象
+    :param dst: 密文文件路径或类文件对象
+    :param iv: 8 字节初始计数器值，None 时随机生成
+    :param chunk_size: 每次读取的字节数，会向下取整为 8 的倍数
+    :return: 使用的初始计数器值
+    """
+    cipher = as_cipher(key)
+    iv = check_iv(iv)
+    chunk_size = max(BLOCK_SIZE, chunk_size - chunk_size % BLOCK_SIZE)
+    counter = int.from_bytes(iv, "big")
+    with open_stream(src, "rb") as fin, open_stream(dst, "wb") as fout:
+        for chunk in read_chunks(fin, chunk_size):
+            fout.write(ctr_xor(cipher, counter, chunk))
+            counter = (counter + len(chunk) // BLOCK_SIZE) & MASK_64
+
+    return iv
+
+
+def ctr_decrypt(key, src, dst, iv, chunk_size=CHUNK_SIZE):
+    """
+    CTR 模式流式解密，与加密是同一个运算
+    :param key: DESCipher 对象或密钥文本字符串
+    :param src: 密文文件路径或类文件对象
+    :param dst: 明文文件路径或类文件对象
+    :param iv: 加密时使用的 8 字节初始计数器值
+    :param chunk_size: 每次读取的字节数，会向下取整为 8 的倍数
+    """
+    ctr_encrypt(key, src, dst, iv, chunk_size)
+
+
+# 工作进程中的加解密对象，由 init_ctr_worker 在进程启动时设置一次
+worker_cipher = None
+
+
+def init_ctr_worker(cipher):
+    """
+    进程池初始化函数，每个工作进程只接收一次子密钥
+    :param cipher: 加解密对象
+    """
+    global worker_cipher
+    worker_cipher = cipher
+
+
+def ctr_worker(counter, data):
+    """
+    :param counter: 本段第一个分组的计数器值
+    :param data: 本段数据
+    :return: 本段的异或结果
+    """
+    return ctr_xor(worker_cipher, counter, data)
+
+
+def ctr_xor_parallel(key, counter, data, out=None, workers=None, segment_size=SEGMENT_SIZE):
+    """
+    多进程 CTR 运算，结果与 ctr_xor 一致
+    :param key: DESCipher 对象或密钥文本字符串
+    :param counter: 第一个分组使用的 64 位计数器值
+    :param data: 支持缓冲区协议的输入数据
+    :param out: 预先分配好的、与输入等长的可写缓冲区，None 时新建 bytearray
+    :param workers: 进程数，None 时为 CPU 核数
+    :param segment_size: 每个任务处理的字节数，会向下取整为 8 的倍数
+    :return: out
+    """
+    cipher = as_cipher(key)
+    data = memoryview(data).cast("B")
+    n = len(data)
+    if out is None:
+        out = bytearray(n)
+    if len(out) != n:
+        raise ValueError("输出缓冲区长度必须与输入相同")
+    # 分段边界必须与 8 字节对齐，保证每段的计数器是整数
+    segment_size = max(BLOCK_SIZE, segment_size - segment_size % BLOCK_SIZE)
+    workers = workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(workers, initializer=init_ctr_worker, initargs=(cipher,)) as pool:
+        # 限制同时在途的任务数，避免把整个输入一次性复制进任务队列
+        pending = deque()
+        for start in range(0, n, segment_size):
+            seg = data[start:start + segment_size]
+            ctr = (counter + start // BLOCK_SIZE) & MASK_64
+            pending.append((start, pool.submit(ctr_worker, ctr, bytes(seg))))
+            if len(pending) >= workers * 2:
+                pos, future = pending.popleft()
+                result = future.result()
+                out[pos:pos + len(result)] = result
+        while pending:
+            pos, future = pending.popleft()
+            result = future.result()
+            out[pos:pos + len(result)] = result
+
+    return out
+
+
+def ctr_crypt_file_parallel(key, src, dst, iv=None, workers=None, segment_size=SEGMENT_SIZE):
+    """
+    多进程 CTR 文件加解密，输入与输出都通过内存映射访问
+    :param key: DESCipher 对象或密钥文本字符串
+    :param src: 输入文件路径
+    :param dst: 输出文件路径，会被预先扩展到与输入等长
+    :param iv: 8 字节初始计数器值，None 时随机生成（仅加密时可以为 None）
+    :param workers: 进程数，None 时为 CPU 核数
+    :param segment_size: 每个任务处理的字节数
+    :return: 使用的初始计数器值
+    """
+    iv = check_iv(iv)
+    counter = int.from_bytes(iv, "big")
+    size = os.path.getsize(src)
+    with open(src, "rb") as fin, open(dst, "w+b") as fout:
+        fout.truncate(size)
+        if size == 0:
+            return iv
+        with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as data, \
+                mmap.mmap(fout.fileno(), size) as out:
+            ctr_xor_parallel(key, counter, data, out, workers, segment_size)
+
+    return iv
+
+
+if __name__ == '__main__':
+    import io
+
+    key = "12345678"
+    message = ("世界你好" * 1000).encode("UTF-8")
+
+    for enc, dec in ((cbc_encrypt, cbc_decrypt), (ctr_encrypt, ctr_decrypt)):
+        c = io.BytesIO()
+        v = enc(key, io.BytesIO(message), c, chunk_size=1024)
+        m = io.BytesIO()
+        dec(key, io.BytesIO(c.getvalue()), m, v, chunk_size=1024)
+        print("%s: %s" % (enc.__name__, m.getvalue() == message))
@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time    : 10/18/2026 19:50
+# @Author  : YLD10
+# @Email   : yl1315348050@yahoo.com
+# @File    : envelope.py
+# @Software: PyCharm
+"""
+RSA + 3DES 数字信封
+
+每个信封随机生成一个会话密钥，数据用 3DES 的 CTR 模式加密，
+只有会话密钥用 RSA 公钥加密，所以每条消息的 RSA 开销固定，整体吞吐由对称加密决定。
+会话密钥的后 32 字节作为 HMAC-SHA256 的密钥，对信封头、加密后的会话密钥和密文整体做校验，
+打开信封时先校验，通过后才解密，任何一位被改动都会被发现。
+
+信封格式（大端）：
+    magic      4 字节  b"DEV2"
+    cipher     1 字节  3 为 3DES
+    key_len    2 字节  加密后的会话密钥长度
+    iv         8 字节  CTR 初始计数器值
+    data_len   8 字节  明文长度，CTR 模式下与密文等长
+    wrapped    key_len 字节  RSA.encrypt_bytes 加密的会话密钥（3DES 密钥 24 字节 + HMAC 密钥 32 字节）
+    data       data_len 字节 密文
+    mac        32 字节 HMAC-SHA256(以上全部内容)
+"""
+import hashlib
+import hmac
+import os
+import struct
+
+from DES import TripleDES
+from des_mode import BLOCK_SIZE, CHUNK_SIZE, MASK_64, check_iv, ctr_xor, ctr_xor_parallel, open_stream
+
+MAGIC = b"DEV2"
+HEADER = struct.Struct(">4sBH8sQ")
+
+# 本仓库原有的单 DES 不做子密钥循环左移，有效密钥只有 48 位，因此信封只提供 3DES
+CIPHER_3DES = 3
+KEY_SIZES = {CIPHER_3DES: 24}
+MAC_KEY_SIZE = 32
+MAC_SIZE = hashlib.sha256().digest_size
+
+
+def make_cipher(cipher_id, cipher_key):
+    """
+    :param cipher_id: CIPHER_3DES
+    :param cipher_key: 会话密钥中的对称加密部分
+    :return: 加解密对象；会话密钥只用一次，不放进子密钥缓存
+    """
+    if cipher_id == CIPHER_3DES:
+        return TripleDES(cipher_key[:8], cipher_key[8:16], cipher_key[16:], cache=None)
+    raise ValueError("未知的加密算法：%d" % cipher_id)
+
+
+def make_header(public_key, cipher_id, data_len, iv=None):
+    """
+    生成会话密钥并构造信封头
+    :param public_key: RSAPublicKey 或 RSAPrivateKey
+    :param cipher_id: CIPHER_3DES
+    :param data_len: 明文长度
+    :param iv: 8 字节初始计数器值，None 时随机生成
+    :return: (信封头字节串, 加解密对象, 初始计数器值, 已经计入信封头的 HMAC 对象)
+    """
+    if cipher_id not in KEY_SIZES:
+        raise ValueError("未知的加密算法：%d" % cipher_id)
+    session_key = os.urandom(KEY_SIZES[cipher_id] + MAC_KEY_SIZE)
+    iv = check_iv(iv)
+    wrapped = public_key.encrypt_bytes(session_key)
+    header = HEADER.pack(MAGIC, cipher_id, len(wrapped), iv, data_len) + wrapped
+    cipher_key, mac_key = session_key[:-MAC_KEY_SIZE], session_key[-MAC_KEY_SIZE:]
+    mac = hmac.new(mac_key, header, hashlib.sha256)
+    return header, make_cipher(cipher_id, cipher_key), int.from_bytes(iv, "big"), mac
+
+
+def parse_header(read, private_key):
+    """
+    读取并解析信封头
+    :param read: read(n) 函数
+    :param private_key: RSAPrivateKey
+    :return: (加解密对象, 初始计数器值, 明文长度, 已经计入信封头的 HMAC 对象)
+    """
+    fixed = read(HEADER.size)
+    if len(fixed) != HEADER.size:
+        raise ValueError("信封头不完整")
+    magic, cipher_id, key_len, iv, data_len = HEADER.unpack(fixed)
+    if magic != MAGIC:
+        raise ValueError("不是有效的信封数据")
+    if cipher_id not in KEY_SIZES:
+        raise ValueError("未知的加密算法：%d" % cipher_id)
+    wrapped = read(key_len)
+    if len(wrapped) != key_len:
+        raise ValueError("信封头不完整")
+    session_key = private_key.decrypt_bytes(wrapped)
+    if len(session_key) != KEY_SIZES[cipher_id] + MAC_KEY_SIZE:
+        raise ValueError("会话密钥长度错误")
+    cipher_key, mac_key = session_key[:-MAC_KEY_SIZE], session_key[-MAC_KEY_SIZE:]
+    mac = hmac.new(mac_key, fixed + wrapped, hashlib.sha256)
+    return make_cipher(cipher_id, cipher_key), int.from_bytes(iv, "big"), data_len, mac
+
+
+def check_mac(mac, tag):
+    """
+    :param mac: 已经计入全部数据的 HMAC 对象
+    :param tag: 信封末尾的校验值
+    """
+    if not hmac.compare_digest(mac.digest(), tag):
+        raise ValueError("信封校验失败，数据被篡改或私钥不匹配")
+
+
+def read_body(fp, length, chunk_size):
+    """
+    按块读取长度为 length 的密文，除最后一块外每块长度都是 chunk_size
+    :param fp: 类文件对象
+    :param length: 要读取的总字节数
+    :param chunk_size: 块大小
+    :return: 字节块的生成器
+    """
+    while length > 0:
+        n = min(chunk_size, length)
+        chunk = fp.read(n)
+        # 管道、套接字等对象可能返回不足 n 的数据，补齐以保证分组对齐
+        while len(chunk) < n:
+            more = fp.read(n - len(chunk))
+            if not more:
+                raise ValueError("信封数据被截断")
+            chunk += more
+        length -= n
+        yield chunk
+
+
+def seal(data, public_key, cipher_id=CIPHER_3DES, iv=None, workers=None):
+    """
+    把内存中的数据封装成信封
+    :param data: 明文字节数据
+    :param public_key: RSAPublicKey 或 RSAPrivateKey
+    :param cipher_id: CIPHER_3DES
+    :param iv: 8 字节初始计数器值，None 时随机生成
+    :param workers: 大于 1 时用多进程 CTR 加密
+    :return: 信封字节串
+    """
+    data = memoryview(data).cast("B")
+    header, cipher, counter, mac = make_header(public_key, cipher_id, len(data), iv)
+    if workers is not None and workers > 1:
+        body = ctr_xor_parallel(cipher, counter, data, workers=workers)
+    else:
+        body = ctr_xor(cipher, counter, data)
+    mac.update(body)
+    return header + body + mac.digest()
+
+
+def open_envelope(envelope, private_key, workers=None):
+    """
+    打开 seal 生成的信封，校验通过后才解密
+    :param envelope: 信封字节数据
+    :param private_key: RSAPrivateKey
+    :param workers: 大于 1 时用多进程 CTR 解密
+    :return: 明文字节串
+    """
+    view = memoryview(envelope).cast("B")
+    pos = 0
+
+    def read(n):
+        nonlocal pos
+        chunk = view[pos:pos + n]
+        pos += len(chunk)
+        return bytes(chunk)
+
+    cipher, counter, data_len, mac = parse_header(read, private_key)
+    if len(view) - pos != data_len + MAC_SIZE:
+        raise ValueError("信封数据长度与头部记录的不一致")
+    body = view[pos:pos + data_len]
+    mac.update(body)
+    check_mac(mac, view[pos + data_len:])
+    if workers is not None and workers > 1:
+        return bytes(ctr_xor_parallel(cipher, counter, body, workers=workers))
+    return ctr_xor(cipher, counter, body)
+
+
+def seal_file(src, dst, public_key, cipher_id=CIPHER_3DES, iv=None, chunk_size=CHUNK_SIZE):
+    """
+    流式封装文件，内存占用与文件大小无关
+    :param src: 明文文件路径或可定位（seek）的类文件对象，从当前位置读到结尾
+    :param dst: 信封文件路径或类文件对象
+    :param public_key: RSAPublicKey 或 RSAPrivateKey
+    :param cipher_id: CIPHER_3DES
+    :param iv: 8 字节初始计数器值，None 时随机生成
+    :param chunk_size: 每次读取的字节数，会向下取整为 8 的倍数
+    """
+    chunk_size = max(BLOCK_SIZE, chunk_size - chunk_size % BLOCK_SIZE)
+    with open_stream(src, "rb") as fin, open_stream(dst, "wb") as fout:
+        # 信封头里要写明文长度，先定位到结尾取得长度
+        pos = fin.tell()
+        data_len = fin.seek(0, os.SEEK_END) - pos
+        fin.seek(pos)
+        header, cipher, counter, mac = make_header(public_key, cipher_id, data_len, iv)
+        fout.write(header)
+        for chunk in read_body(fin, data_len, chunk_size):
+            chunk = ctr_xor(cipher, counter, chunk)
+            mac.update(chunk)
+            fout.write(chunk)
+            counter = (counter + len(chunk) // BLOCK_SIZE) & MASK_64
+        fout.write(mac.digest())
+
+
+def open_file(src, dst, private_key, chunk_size=CHUNK_SIZE):
+    """
+    流式打开 seal_file 或 seal 生成的信封。
+    先完整读一遍密文做校验，通过后回到密文开头再解密写出，所以 src 必须可定位（seek），
+    校验失败时不会创建或写入 dst
+    :param src: 信封文件路径或可定位的类文件对象
+    :param dst: 明文文件路径或类文件对象
+    :param private_key: RSAPrivateKey
+    :param chunk_size: 每次读取的字节数，会向下取整为 8 的倍数
+    """
+    chunk_size = max(BLOCK_SIZE, chunk_size - chunk_size % BLOCK_SIZE)
+    with open_stream(src, "rb") as fin:
+        cipher, counter, data_len, mac = parse_header(fin.read, private_key)
+        pos = fin.tell()
+        for chunk in read_body(fin, data_len, chunk_size):
+            mac.update(chunk)
+        tag = fin.read(MAC_SIZE)
+        if len(tag) != MAC_SIZE:
+            raise ValueError("信封数据被截断")
+        if fin.read(1):
+            raise ValueError("信封数据长度与头部记录的不一致")
+        check_mac(mac, tag)
+
+        fin.seek(pos)
+        with open_stream(dst, "wb") as fout:
+            for chunk in read_body(fin, data_len, chunk_size):
+                fout.write(ctr_xor(cipher, counter, chunk))
+                counter = (counter + len(chunk) // BLOCK_SIZE) & MASK_64
+
+
+if __name__ == '__main__':
+    import time
+
+    from RSA import generate_keypair
+
+    key = generate_keypair(2048)
+    message = os.urandom(1024 * 1024)
+    start = time.perf_counter()
+    sealed = seal(message, key.public_key())
+    cost = time.perf_counter() - start
+    print("3DES 信封：%d 字节，头部与校验 %d 字节，加密 %.1f KB/s，解密结果一致：%s" % (
+        len(sealed), len(sealed) - len(message), len(message) / 1024 / cost, open_envelope(sealed, key) == message))
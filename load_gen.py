@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time    : 10/18/2026 18:05
+# @Author  : YLD10
+# @Email   : yl1315348050@yahoo.com
+# @File    : load_gen.py
+# @Software: PyCharm
+"""
+crypto_service 的本地压测脚本
+
+开若干条连接，每条连接保持固定数量的在途请求，统计吞吐与客户端侧的 p50/p99 延迟。
+
+用法：
+    python crypto_service.py --port 8765 &
+    python load_gen.py --port 8765 --connections 16 --requests 2000 --op des_encrypt
+"""
+import argparse
+import asyncio
+import json
+import time
+
+DEFAULT_KEYS = {
+    "des_encrypt": "12345678",
+    "des_decrypt": "12345678",
+    # RSA.py __main__ 中的演示参数：n = 53 * 61，e = 101，d = 1421
+    "rsa_encrypt": [101, 3233],
+    "rsa_decrypt": [1421, 3233],
+}
+
+
+def percentile(ordered, p):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))]
+
+
+async def open_connection(args):
+    if args.unix:
+        return await asyncio.open_unix_connection(args.unix)
+    return await asyncio.open_connection(args.host, args.port)
+
+
+async def run_connection(args, conn_id, payload, latencies, errors):
+    """
+    单条连接：保持 args.pipeline 个在途请求，直到发完 args.requests 个
+    """
+    reader, writer = await open_connection(args)
+    sent_at = {}
+    next_id = 0
+    done = 0
+
+    def send_one():
+        nonlocal next_id
+        request_id = "%d-%d" % (conn_id, next_id)
+        next_id += 1
+        request = {"id": request_id, "op": args.op, "key": DEFAULT_KEYS[args.op], "data": payload}
+        sent_at[request_id] = time.perf_counter()
+        writer.write((json.dumps(request, ensure_ascii=False) + "\n").encode("UTF-8"))
+
+    for _ in range(min(args.pipeline, args.requests)):
+        send_one()
+    await writer.drain()
+    while done < args.requests:
+        line = await reader.readline()
+        if not line:
+            break
+        response = json.loads(line)
+        latencies.append(time.perf_counter() - sent_at.pop(response["id"]))
+        if "error" in response:
+            errors.append(response["error"])
+        done += 1
+        if next_id < args.requests:
+            send_one()
+            await writer.drain()
+    writer.close()
+
+
+async def fetch_stats(args):
+    reader, writer = await open_connection(args)
+    writer.write(b'{"id": "stats", "op": "stats"}\n')
+    await writer.drain()
+    stats = json.loads(await reader.readline())["result"]
+    writer.close()
+    return stats
+
+
+async def run(args):
+    # 解密请求需要先准备一份合法的密文
+    payload = args.data
+    if args.op in ("des_decrypt", "rsa_decrypt"):
+        import DES
+        import RSA
+        if args.op == "des_decrypt":
+            payload = DES.encrypt(args.data, DEFAULT_KEYS["des_encrypt"])
+        else:
+            payload = RSA.encrypt(args.data, *DEFAULT_KEYS["rsa_encrypt"])
+
+    latencies = []
+    errors = []
+    start = time.perf_counter()
+    await asyncio.gather(*[run_connection(args, i, payload, latencies, errors)
+                           for i in range(args.connections)])
+    cost = time.perf_counter() - start
+
+    latencies.sort()
+    print("请求数：%d，错误：%d，耗时：%.3f s" % (len(latencies), len(errors), cost))
+    print("吞吐：%.1f req/s" % (len(latencies) / cost))
+    print("客户端延迟 p50：%.3f ms，p99：%.3f ms" % (percentile(latencies, 50) * 1e3,
+                                               percentile(latencies, 99) * 1e3))
+    print("服务端统计：%s" % json.dumps(await fetch_stats(args), ensure_ascii=False))
+    if errors:
+        print("首个错误：%s" % errors[0])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="crypto_service 压测")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="Unix 套接字路径")
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=1000, help="每条连接的请求数")
+    parser.add_argument("--pipeline", type=int, default=4, help="每条连接的在途请求数")
+    parser.add_argument("--op", default="des_encrypt", choices=sorted(DEFAULT_KEYS))
+    parser.add_argument("--data", default="世界你好")
+    args = parser.parse_args(argv)
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -5,7 +5,41 @@
 # @Email   : yl1315348050@yahoo.com
 # @File    : prime.py
 # @Software: PyCharm
+import argparse
 import math
+import mmap
+import os
+import secrets
+import struct
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from itertools import compress
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 筛候选素数时使用的小素数上界与每个窗口的奇数个数
+SIEVE_LIMIT = 1 << 14
+WINDOW_SIZE = 4096
+# 分段筛每段的字节数，每个字节对应一个奇数，一段可以放进 L2 缓存
+SEGMENT_BYTES = 1 << 17
+# isprime_many 预筛使用的小素数上界，通过预筛且小于其平方的数一定是素数
+SCREEN_LIMIT = 256
+# 对所有小于 2^64 的整数都确定正确的 Miller-Rabin 底数（Sinclair）
+MR_BASES_64 = (2, 325, 9375, 28178, 450775, 9780504, 1795265022)
+# 前 13 个素数作底数时，小于该值的整数结果确定正确（OEIS A014233）
+MR_BASES_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+MR_PRIMES_LIMIT = 3317044064679887385961981
+
+# 素数位图文件：16 字节文件头（magic + 上界 N），之后第 i 位（按字节从低位起）表示奇数 2i+1 是否为素数
+BITMAP_MAGIC = b"PBM1"
+BITMAP_HEADER = struct.Struct("<4s4xQ")
+BITMAP_ENV = "PRIME_BITMAP"
+# 当前加载的位图，isprime 在其范围内直接查表
+loaded_bitmap = None
 
 
 def isprime(num):
@@ -20,6 +54,9 @@ def isprime(num):
     # 筛掉小于 2 的数
     if num < 2:
         return False
+    # 已加载素数位图且在其范围内时直接查表
+    if loaded_bitmap is not None and num < loaded_bitmap.limit:
+        return loaded_bitmap.isprime(num)
     # 筛掉 2 和 3
     if 2 == num or 3 == num:
         return True
@@ -42,5 +79,489 @@ def isprime(num):
     return True
 
 
+def small_primes(limit):
+    """
+    埃拉托斯特尼筛法
+    :param limit: 上界（不含）
+    :return: 小于 limit 的素数列表
+    """
+    if limit < 3:
+        return []
+    flags = bytearray([1]) * limit
+    flags[0] = flags[1] = 0
+    for i in range(2, int(math.isqrt(limit - 1)) + 1):
+        if flags[i]:
+            flags[i * i::i] = bytes(len(range(i * i, limit, i)))
+    return [i for i in range(limit) if flags[i]]
+
+
+SMALL_PRIMES = small_primes(SIEVE_LIMIT)
+
+
+def primes_in_range(lo, hi, segment_bytes=SEGMENT_BYTES):
+    """
+    分段埃拉托斯特尼筛法，惰性产出 [lo, hi) 内的素数
+    只筛奇数，每段一个 bytearray，内存占用为 √hi 以内的素数表加一段缓冲区，与区间长度无关
+    :param lo: 下界（含）
+    :param hi: 上界（不含）
+    :param segment_bytes: 每段的字节数
+    :return: 素数的生成器，从小到大
+    """
+    lo = max(lo, 2)
+    if hi <= lo:
+        return
+    if lo == 2:
+        yield 2
+        lo = 3
+    # 第一个奇数
+    start = lo | 1
+    if start >= hi:
+        return
+    base = small_primes(math.isqrt(hi - 1) + 1)[1:]
+    while start < hi:
+        size = min(segment_bytes, (hi - start + 1) // 2)
+        end = start + 2 * size
+        yield from compress(range(start, end, 2), sieve_segment(start, size, base))
+        start = end
+
+
+def sieve_segment(start, size, base):
+    """
+    筛一段奇数
+    :param start: 段内第一个奇数
+    :param size: 段内奇数的个数
+    :param base: 不超过 √(start + 2 * size) 的奇素数列表，从小到大
+    :return: bytearray，第 k 项为 1 表示 start + 2k 是素数
+    """
+    end = start + 2 * size
+    flags = bytearray([1]) * size
+    for p in base:
+        p2 = p * p
+        if p2 >= end:
+            break
+        if p2 >= start:
+            k = (p2 - start) >> 1
+        else:
+            # start + 2k ≡ 0 (mod p) 的最小 k，(p + 1) // 2 为 2 模 p 的逆元
+            k = (-start) % p * ((p + 1) >> 1) % p
+        flags[k::p] = bytes(len(range(k, size, p)))
+    # 基素数本身从 p*p 开始划，不会被划掉；1 需要单独排除
+    if start == 1:
+        flags[0] = 0
+    return flags
+
+
+def prime_count(num):
+    """
+    素数计数函数 π(num)，即不超过 num 的素数个数
+    使用 Lucy_Hedgehog 算法，时间约 O(num^(3/4))，内存 O(√num)；安装了 NumPy 时按素数整段向量化
+    :param num:
+    :return: 不超过 num 的素数个数
+    """
+    if num < 2:
+        return 0
+    r = math.isqrt(num)
+    if np is not None:
+        return prime_count_numpy(num, r)
+    # small[v] = S(v)，large[i] = S(num // i)，S 为尚未被筛掉的 2..v 的个数
+    small = [v - 1 for v in range(r + 1)]
+    small[0] = 0
+    large = [0] + [num // i - 1 for i in range(1, r + 1)]
+    for p in range(2, r + 1):
+        if small[p] == small[p - 1]:
+            continue
+        sp = small[p - 1]
+        p2 = p * p
+        lim = min(r, num // p2)
+        ip = min(lim, r // p)
+        for i in range(1, ip + 1):
+            large[i] -= large[i * p] - sp
+        for i in range(ip + 1, lim + 1):
+            large[i] -= small[num // (i * p)] - sp
+        for v in range(r, p2 - 1, -1):
+            small[v] -= small[v // p] - sp
+    return large[1]
+
+
+def prime_count_numpy(num, r):
+    """
+    prime_count 的 NumPy 实现，每个素数的三组更新各是一次切片运算
+    """
+    small = np.arange(-1, r, dtype=np.int64)
+    small[0] = 0
+    large = np.empty(r + 1, dtype=np.int64)
+    large[0] = 0
+    large[1:] = num // np.arange(1, r + 1, dtype=np.int64) - 1
+    for p in range(2, r + 1):
+        if small[p] == small[p - 1]:
+            continue
+        sp = small[p - 1]
+        p2 = p * p
+        lim = min(r, num // p2)
+        ip = min(lim, r // p)
+        # 右侧先整体求值，读到的都是本轮更新前的值，与逐个从大到小更新等价
+        large[1:ip + 1] -= large[p:ip * p + 1:p] - sp
+        if lim > ip:
+            large[ip + 1:lim + 1] -= small[num // (np.arange(ip + 1, lim + 1, dtype=np.int64) * p)] - sp
+        if r >= p2:
+            small[p2:] -= small[np.arange(p2, r + 1, dtype=np.int64) // p] - sp
+    return int(large[1])
+
+
+SCREEN_PRIMES = small_primes(SCREEN_LIMIT)
+SCREEN_SET = frozenset(SCREEN_PRIMES)
+SCREEN_PRIMORIAL = math.prod(SCREEN_PRIMES)
+
+
+def strong_probable_prime(num, base):
+    """
+    以 base 为底的强概率素数测试
+    :param num: 大于 2 的奇数
+    :param base: 底数
+    :return: 通过测试返回 True，一定是合数返回 False
+    """
+    base %= num
+    if base == 0:
+        return True
+    d = num - 1
+    s = (d & -d).bit_length() - 1
+    d >>= s
+    x = pow(base, d, num)
+    if x == 1 or x == num - 1:
+        return True
+    for _ in range(s - 1):
+        x = x * x % num
+        if x == num - 1:
+            return True
+    return False
+
+
+def isprime_mr(num):
+    """
+    不做预筛的 Miller-Rabin 判断，num 须为不含小于 SCREEN_LIMIT 的素因子的奇数
+    小于 3.3 * 10^24 时使用固定底数，结果确定正确；更大的数在 13 个素数底数之外再加随机底数，
+    是强概率素数判断
+    """
+    if num < SCREEN_LIMIT * SCREEN_LIMIT:
+        return True
+    bases = MR_BASES_64 if num < 1 << 64 else MR_BASES_PRIMES
+    for base in bases:
+        if not strong_probable_prime(num, base):
+            return False
+    if num >= MR_PRIMES_LIMIT:
+        return miller_rabin(num, mr_rounds(num.bit_length()))
+    return True
+
+
+def isprime_fast(num):
+    """
+    单个数的快速判断，结果与 isprime 相同
+    :param num:
+    :return: 是素数返回 True 否则返回 False
+    """
+    if not isinstance(num, int) or num < 2:
+        return False
+    if num < SCREEN_LIMIT:
+        return num in SCREEN_SET
+    if loaded_bitmap is not None and num < loaded_bitmap.limit:
+        return loaded_bitmap.isprime(num)
+    # 一次 gcd 完成对所有小素数的试除
+    if math.gcd(num, SCREEN_PRIMORIAL) != 1:
+        return False
+    return isprime_mr(num)
+
+
+def isprime_many(values):
+    """
+    批量素数判断，结果与逐个调用 isprime 相同
+    NumPy 整数数组先对所有元素同时做小素数预筛，只有幸存者逐个做 Miller-Rabin；
+    其他序列逐个用与小素数之积求 gcd 的方式预筛
+    :param values: 序列或 NumPy 数组；NumPy 整数数组的元素按对应的 Python 整数判断，
+                   非整数类型的数组结果全为 False
+    :return: 输入为 NumPy 数组时返回同形状的 bool 数组，否则返回 bool 列表
+    """
+    if np is not None and isinstance(values, np.ndarray):
+        if values.dtype.kind in "iu":
+            return isprime_array(values)
+        if values.dtype == object:
+            return np.array([isprime_fast(v) for v in values.ravel()], dtype=bool).reshape(values.shape)
+        return np.zeros(values.shape, dtype=bool)
+    return [isprime_fast(v) for v in values]
+
+
+def isprime_array(values):
+    """
+    isprime_many 的 NumPy 整数数组实现
+    """
+    flat = values.ravel()
+    if loaded_bitmap is not None and flat.size and flat.min() >= 0 and flat.max() < loaded_bitmap.limit:
+        return loaded_bitmap.isprime_array(flat).reshape(values.shape)
+    result = np.zeros(flat.shape, dtype=bool)
+    candidate = flat >= 2
+    small = flat < SCREEN_LIMIT
+    for p in SCREEN_PRIMES:
+        divisible = flat % p == 0
+        result |= divisible & (flat == p)
+        candidate &= ~divisible
+    # 幸存者中小于 SCREEN_LIMIT^2 的直接是素数
+    result |= candidate & (small | (flat < SCREEN_LIMIT * SCREEN_LIMIT))
+    rest = np.flatnonzero(candidate & (flat >= SCREEN_LIMIT * SCREEN_LIMIT))
+    for i, v in zip(rest.tolist(), flat[rest].tolist()):
+        result[i] = isprime_mr(v)
+    return result.reshape(values.shape)
+
+
+def mr_rounds(bits):
+    """
+    随机候选数的 Miller-Rabin 轮数，出错概率低于 2^-100（参考 FIPS 186-4 表 C.2）
+    :param bits: 候选数的二进制位数
+    """
+    if bits >= 1536:
+        return 3
+    if bits >= 1024:
+        return 4
+    if bits >= 512:
+        return 7
+    if bits >= 256:
+        return 16
+    return 40
+
+
+def miller_rabin(num, rounds):
+    """
+    Miller-Rabin 概率素性测试，底数随机选取
+    :param num: 大于 3 的奇数
+    :param rounds: 测试轮数
+    :return: 可能是素数返回 True，一定是合数返回 False
+    """
+    d = num - 1
+    s = (d & -d).bit_length() - 1
+    d >>= s
+    for _ in range(rounds):
+        x = pow(2 + secrets.randbelow(num - 3), d, num)
+        if x == 1 or x == num - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % num
+            if x == num - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def prime_in_window(start, size=WINDOW_SIZE, e=None, rounds=None):
+    """
+    在 start, start + 2, ..., start + 2 * (size - 1) 中找第一个素数
+    先用小素数对整个窗口做增量筛：每个小素数只需对 start 取一次模，
+    之后按步长把它的倍数划掉，剩下的候选数才做 Miller-Rabin 测试
+    :param start: 大于 SIEVE_LIMIT 的奇数
+    :param size: 窗口中的奇数个数
+    :param e: 不为 None 时还要求 gcd(p - 1, e) == 1，e 应为素数
+    :param rounds: Miller-Rabin 轮数，None 时按位数选取
+    :return: 找到的素数，没有时返回 None
+    """
+    flags = bytearray([1]) * size
+    for p in SMALL_PRIMES[1:]:
+        # start + 2k ≡ 0 (mod p) 的最小 k，(p + 1) // 2 为 2 模 p 的逆元
+        k = (-start) % p * ((p + 1) // 2) % p
+        flags[k::p] = bytes(len(range(k, size, p)))
+    rounds = rounds or mr_rounds(start.bit_length())
+    k = flags.find(1)
+    while k >= 0:
+        candidate = start + 2 * k
+        if (e is None or (candidate - 1) % e != 0) and miller_rabin(candidate, rounds):
+            return candidate
+        k = flags.find(1, k + 1)
+    return None
+
+
+def random_window_start(bits):
+    """
+    :return: 最高两位为 1 的随机奇数，两个这样的 bits 位素数之积恰好为 2 * bits 位
+    """
+    return secrets.randbits(bits) | (3 << (bits - 2)) | 1
+
+
+def search_window(bits, e, rounds):
+    """
+    进程池任务：随机选一个窗口搜索 bits 位素数
+    :return: 素数或 None
+    """
+    prime = prime_in_window(random_window_start(bits), WINDOW_SIZE, e, rounds)
+    if prime is not None and prime.bit_length() != bits:
+        return None
+    return prime
+
+
+def random_primes(bits, count=1, e=None, workers=None, rounds=None):
+    """
+    生成若干个互不相同的 bits 位随机素数
+    :param bits: 素数的二进制位数，不小于 16
+    :param count: 素数个数
+    :param e: 不为 None 时要求 gcd(p - 1, e) == 1，e 应为素数
+    :param workers: 进程数，None 或 1 时在当前进程中搜索
+    :param rounds: Miller-Rabin 轮数，None 时按位数选取
+    :return: 素数列表
+    """
+    if bits < 16:
+        raise ValueError("素数位数不能小于 16")
+    primes = []
+    if workers is None or workers <= 1:
+        while len(primes) < count:
+            prime = search_window(bits, e, rounds)
+            if prime is not None and prime not in primes:
+                primes.append(prime)
+        return primes
+
+    # 每个任务独立搜索一个随机窗口，耗时有上界，凑够 count 个素数后剩余任务很快结束
+    with ProcessPoolExecutor(workers) as pool:
+        running = {pool.submit(search_window, bits, e, rounds) for _ in range(workers)}
+        while len(primes) < count:
+            finished, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                prime = future.result()
+                if prime is not None and prime not in primes and len(primes) < count:
+                    primes.append(prime)
+                running.add(pool.submit(search_window, bits, e, rounds))
+        for future in running:
+            future.cancel()
+    return primes
+
+
+# 把 0/1 字节翻译成 "0"/"1" 字符，再按二进制解析成整数，即可在 C 层完成按位打包
+BIT_CHARS = bytes.maketrans(b"\x00\x01", b"01")
+
+
+def pack_bits(flags):
+    """
+    :param flags: 只含 0、1 的 bytearray，长度为 8 的倍数
+    :return: 第 i 位（按字节从低位起）为 flags[i] 的字节串
+    """
+    if not flags:
+        return b""
+    return int(flags.translate(BIT_CHARS)[::-1], 2).to_bytes(len(flags) // 8, "little")
+
+
+def write_bitmap(path, limit, segment_bytes=SEGMENT_BYTES):
+    """
+    分段筛出 [0, limit) 内的素数，写成只含奇数的位图文件
+    :param path: 文件路径
+    :param limit: 上界 N（不含），位图大小约为 N / 16 字节
+    :param segment_bytes: 每段的奇数个数，会向下取整为 8 的倍数
+    """
+    segment_bytes = max(8, segment_bytes - segment_bytes % 8)
+    odd_count = (limit + 1) // 2
+    base = small_primes(math.isqrt(max(limit - 1, 0)) + 1)[1:]
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as fp:
+        fp.write(BITMAP_HEADER.pack(BITMAP_MAGIC, limit))
+        start = 1
+        done = 0
+        while done < odd_count:
+            size = min(segment_bytes, odd_count - done)
+            flags = sieve_segment(start, size, base)
+            # 最后一段补 0 到整字节
+            flags += bytes(-size % 8)
+            fp.write(pack_bits(flags))
+            start += 2 * size
+            done += size
+    # 写完再替换，其他进程不会映射到写了一半的文件
+    os.replace(tmp, path)
+
+
+class PrimeBitmap(object):
+    """
+    内存映射的素数位图，多个进程打开同一个文件时通过页缓存共享，每次查询 O(1)
+    """
+
+    def __init__(self, path):
+        """
+        :param path: write_bitmap 生成的文件路径
+        """
+        self.path = path
+        with open(path, "rb") as fp:
+            self.mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.mm) < BITMAP_HEADER.size:
+            self.mm.close()
+            raise ValueError("素数位图文件不完整")
+        magic, self.limit = BITMAP_HEADER.unpack_from(self.mm)
+        if magic != BITMAP_MAGIC or len(self.mm) < BITMAP_HEADER.size + ((self.limit + 1) // 2 + 7) // 8:
+            self.mm.close()
+            raise ValueError("不是有效的素数位图文件")
+
+    def isprime(self, num):
+        """
+        :param num: 0 <= num < limit 的整数
+        :return: 是素数返回 True 否则返回 False
+        """
+        if num & 1 == 0:
+            return num == 2
+        i = num >> 1
+        return (self.mm[BITMAP_HEADER.size + (i >> 3)] >> (i & 7)) & 1 == 1
+
+    def isprime_array(self, values):
+        """
+        :param values: NumPy 整数数组，元素都在 [0, limit) 内
+        :return: bool 数组
+        """
+        bits = np.frombuffer(self.mm, dtype=np.uint8, offset=BITMAP_HEADER.size)
+        index = values.astype(np.int64) >> 1
+        result = ((bits[index >> 3] >> (index & 7).astype(np.uint8)) & 1).astype(bool)
+        # 偶数位置对应的是奇数 2i+1，需要单独处理
+        even = values % 2 == 0
+        result[even] = values[even] == 2
+        return result
+
+    def close(self):
+        self.mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_bitmap(path):
+    """
+    加载素数位图，之后 isprime、isprime_many 在其范围内直接查表
+    :param path: write_bitmap 生成的文件路径
+    :return: PrimeBitmap
+    """
+    global loaded_bitmap
+    bitmap = PrimeBitmap(path)
+    old, loaded_bitmap = loaded_bitmap, bitmap
+    if old is not None:
+        old.close()
+    return bitmap
+
+
+def unload_bitmap():
+    global loaded_bitmap
+    old, loaded_bitmap = loaded_bitmap, None
+    if old is not None:
+        old.close()
+
+
+# 设置环境变量 PRIME_BITMAP=<位图文件> 时在导入时自动加载，短生命周期的进程无需改代码；
+# 文件缺失或损坏时只给出警告，照常用计算判断素性，不影响导入
+if os.environ.get(BITMAP_ENV):
+    try:
+        load_bitmap(os.environ[BITMAP_ENV])
+    except (OSError, ValueError) as ex:
+        warnings.warn("无法加载素数位图 %s，改为直接计算：%s" % (os.environ[BITMAP_ENV], ex), RuntimeWarning)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="生成只含奇数的素数位图文件")
+    parser.add_argument("path", help="输出文件路径")
+    parser.add_argument("limit", type=int, help="上界 N（不含）")
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    write_bitmap(args.path, args.limit)
+    print("已写入 %s：%d 字节，耗时 %.2f s" % (args.path, os.path.getsize(args.path), time.perf_counter() - start))
+
+
 if __name__ == '__main__':
-    pass
+    main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time    : 10/18/2026 16:40
+# @Author  : YLD10
+# @Email   : yl1315348050@yahoo.com
+# @File    : profiler.py
+# @Software: PyCharm
+"""
+DES 与 RSA 流水线的分阶段性能统计
+
+开启时把 DES、RSA 模块中各阶段的函数替换为计时包装，记录调用次数、累计耗时和自身耗时；
+关闭时恢复原函数，因此不开启时没有任何额外开销。
+两种开启方式：
+    1. 设置环境变量 CIPHER_PROFILE=1，DES/RSA 被导入时自动开启，进程退出时打印统计
+       （只统计导入方，直接运行 python DES.py 时代码在 __main__ 中，不会开启）；
+    2. with profiling() as prof: ...，结束后通过 prof.to_dict() / prof.to_folded() 导出。
+to_folded() 输出 flamegraph.pl、speedscope 等工具可直接读取的折叠栈格式。
+"""
+import atexit
+import importlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+ENV_NAME = "CIPHER_PROFILE"
+
+# (模块名, 函数名, 阶段名)
+STAGES = (
+    ("DES", "encrypt", "DES.encrypt"),
+    ("DES", "decrypt", "DES.decrypt"),
+    ("DES", "encrypt_bytes", "DES.encrypt"),
+    ("DES", "decrypt_bytes", "DES.decrypt"),
+    ("DES", "init_displace", "DES.IP"),
+    ("DES", "init_displace_int", "DES.IP"),
+    ("DES", "final_displace", "DES.FP"),
+    ("DES", "final_displace_int", "DES.FP"),
+    ("DES", "init_subkeys", "DES.key_schedule"),
+    ("DES", "init_subkeys_int", "DES.key_schedule"),
+    ("DES", "init_subkeys_std", "DES.key_schedule"),
+    ("DES", "make_schedule", "DES.key_schedule"),
+    ("DES", "make_std_schedule", "DES.key_schedule"),
+    # 整数引擎的扩展置换、S 盒与 P 置换融合在轮函数中，只能统计到 DES.rounds
+    ("DES", "encrypt_round_int", "DES.rounds"),
+    ("DES", "decrypt_round_int", "DES.rounds"),
+    ("DES", "std_round_int", "DES.rounds"),
+    # 以下只覆盖旧的二进制字符串轮函数，DES.encrypt/decrypt 等已不再调用，直接调用 encrypt_round 时才会有数据
+    ("DES", "encrypt_round", "DES.rounds"),
+    ("DES", "decrypt_round", "DES.rounds"),
+    ("DES", "extend_displace", "DES.expansion"),
+    ("DES", "sbox_displace", "DES.sbox"),
+    ("DES", "p_displace", "DES.P"),
+    ("DES", "padding", "DES.padding"),
+    ("DES", "unpadding", "DES.padding"),
+    ("DES", "padding_bytes", "DES.padding"),
+    ("DES", "unpadding_bytes", "DES.padding"),
+    ("DES", "pkcs7_padding", "DES.padding"),
+    ("DES", "pkcs7_unpadding", "DES.padding"),
+    ("DES", "bin2hexstring", "DES.hex"),
+    ("DES", "hex2binstring", "DES.hex"),
+    ("DES", "bytes2hexstring", "DES.hex"),
+    ("DES", "hexstring2bytes", "DES.hex"),
+    ("RSA", "encrypt", "RSA.encrypt"),
+    ("RSA", "decrypt", "RSA.decrypt"),
+    ("RSA", "encrypt_bytes", "RSA.encrypt"),
+    ("RSA", "decrypt_bytes", "RSA.decrypt"),
+    ("RSA", "split_message", "RSA.pack"),
+    ("RSA", "join_cipher", "RSA.pack"),
+    ("RSA", "split_cipher", "RSA.pack"),
+    ("RSA", "join_message", "RSA.pack"),
+    ("RSA", "hash_file", "RSA.hash"),
+    ("RSA", "encrypt_inter", "RSA.modexp"),
+    ("RSA", "decrypt_inter", "RSA.modexp"),
+    ("RSA", "decrypt_crt", "RSA.modexp"),
+    ("RSA", "decrypt_garner", "RSA.modexp"),
+    ("RSA", "string2bin", "RSA.string2bin"),
+    ("RSA", "bin2string", "RSA.bin2string"),
+)
+
+
+class Profiler(object):
+    """
+    按阶段统计调用次数与耗时，阶段嵌套时按调用栈分别记录
+    """
+
+    def __init__(self, stages=STAGES):
+        self.stages = stages
+        self.enabled = False
+        # 调用栈（阶段名元组） -> [调用次数, 累计耗时, 自身耗时]
+        self.records = {}
+        self._originals = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _wrap(self, func, stage):
+        local = self._local
+        records = self.records
+        lock = self._lock
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            stack = getattr(local, "stack", None)
+            if stack is None:
+                stack = local.stack = []
+                local.child = [0.0]
+            # 同一阶段的嵌套调用（如 make_schedule 调用 init_subkeys）只记一次
+            if stack and stack[-1] == stage:
+                return func(*args, **kwargs)
+            stack.append(stage)
+            child = local.child
+            child.append(0.0)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                cost = time.perf_counter() - start
+                key = tuple(stack)
+                stack.pop()
+                children = child.pop()
+                child[-1] += cost
+                with lock:
+                    record = records.get(key)
+                    if record is None:
+                        record = records[key] = [0, 0.0, 0.0]
+                    record[0] += 1
+                    record[1] += cost
+                    record[2] += cost - children
+
+        wrapper.__wrapped_stage__ = stage
+        return wrapper
+
+    def enable(self):
+        """
+        替换各阶段函数为计时包装
+        """
+        if self.enabled:
+            return
+        # 先置位，防止导入模块时触发的 enable_from_env 重入
+        self.enabled = True
+        for module_name, attr, stage in self.stages:
+            module = importlib.import_module(module_name)
+            func = getattr(module, attr, None)
+            if func is None:
+                continue
+            self._originals.append((module, attr, func))
+            setattr(module, attr, self._wrap(func, stage))
+
+    def disable(self):
+        """
+        恢复原函数
+        """
+        for module, attr, func in reversed(self._originals):
+            setattr(module, attr, func)
+        self._originals = []
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self.records.clear()
+
+    def to_dict(self):
+        """
+        :return: {阶段名: {"calls": 调用次数, "total": 累计耗时（秒）, "self": 自身耗时（秒）}}
+        """
+        result = {}
+        with self._lock:
+            items = list(self.records.items())
+        for key, (calls, total, self_time) in items:
+            stage = result.setdefault(key[-1], {"calls": 0, "total": 0.0, "self": 0.0})
+            stage["calls"] += calls
+            stage["self"] += self_time
+            # 同一阶段出现在调用栈的外层时，内层的时间已经算在外层里
+            if key[-1] not in key[:-1]:
+                stage["total"] += total
+        return result
+
+    def to_folded(self, unit=1e6):
+        """
+        :param unit: 每秒对应的计数，默认以微秒为单位
+        :return: 折叠栈格式文本，每行为“阶段;子阶段 自身耗时”
+        """
+        with self._lock:
+            items = sorted(self.records.items())
+        return "\n".join("%s %d" % (";".join(key), round(self_time * unit))
+                         for key, (calls, total, self_time) in items)
+
+    def report(self):
+        """
+        :return: 按累计耗时排序的文本报表
+        """
+        lines = ["%-20s %10s %12s %12s" % ("stage", "calls", "total(ms)", "self(ms)")]
+        stages = sorted(self.to_dict().items(), key=lambda item: -item[1]["total"])
+        for name, stage in stages:
+            lines.append("%-20s %10d %12.3f %12.3f" % (name, stage["calls"],
+                                                       stage["total"] * 1e3, stage["self"] * 1e3))
+        return "\n".join(lines)
+
+
+default_profiler = Profiler()
+
+
+@contextmanager
+def profiling(profiler=None):
+    """
+    在 with 块内开启统计
+    :param profiler: Profiler 对象，None 时新建
+    :return: Profiler 对象
+    """
+    profiler = profiler or Profiler()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+
+
+def enable_from_env():
+    """
+    环境变量 CIPHER_PROFILE 为真时开启默认统计器，并在进程退出时打印报表
+    """
+    if os.environ.get(ENV_NAME, "") in ("", "0") or default_profiler.enabled:
+        return
+    default_profiler.enable()
+    atexit.register(lambda: print(default_profiler.report()))
+
+
+if __name__ == '__main__':
+    import DES
+    import RSA
+
+    with profiling() as prof:
+        c = DES.encrypt("世界你好" * 100, "12345678")
+        DES.decrypt(c, "12345678")
+        RSA.decrypt(RSA.encrypt("中文", 101, 3233), 1421, 3233)
+    print(prof.report())
+    print(prof.to_folded())
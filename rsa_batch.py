@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time    : 10/18/2026 19:10
+# @Author  : YLD10
+# @Email   : yl1315348050@yahoo.com
+# @File    : rsa_batch.py
+# @Software: PyCharm
+"""
+批量 RSA 签名与验签
+
+消息按 chunk_size 条一组交给进程池，每组在工作进程中完成摘要与模幂运算，
+结果按输入顺序返回。密钥只在工作进程启动时传入一次，任务中只携带消息。
+同时在途的组数有上限，输入可以是任意长的迭代器。
+"""
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from RSA import generate_keypair
+
+CHUNK_SIZE = 256
+
+# 工作进程中的密钥与摘要算法，由 init_worker 在进程启动时设置一次
+worker_key = None
+worker_algorithm = None
+
+
+def init_worker(key, algorithm):
+    global worker_key, worker_algorithm
+    worker_key = key
+    worker_algorithm = algorithm
+
+
+def sign_chunk(messages):
+    """
+    :param messages: 一组消息
+    :return: 对应的签名列表
+    """
+    return [worker_key.sign(m, worker_algorithm) for m in messages]
+
+
+def verify_chunk(pairs):
+    """
+    :param pairs: 一组 (消息, 签名)
+    :return: 对应的验签结果列表
+    """
+    return [worker_key.verify(m, sig, worker_algorithm) for m, sig in pairs]
+
+
+def iter_chunks(items, chunk_size):
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def batch_map(func, key, items, algorithm="sha256", workers=None, chunk_size=CHUNK_SIZE):
+    """
+    按组在进程池中执行 func，逐条产出结果，顺序与输入一致
+    :param func: sign_chunk 或 verify_chunk
+    :param key: RSAPrivateKey 或 RSAPublicKey
+    :param items: 消息或 (消息, 签名) 的可迭代对象
+    :param algorithm: 摘要算法名
+    :param workers: 进程数，None 时为 CPU 核数，1 时在当前进程中执行
+    :param chunk_size: 每个任务处理的条数
+    :return: 结果的生成器
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = iter_chunks(items, chunk_size)
+    if workers == 1:
+        init_worker(key, algorithm)
+        for chunk in chunks:
+            yield from func(chunk)
+        return
+
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(key, algorithm)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(func, chunk))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def sign_many(messages, key, algorithm="sha256", workers=None, chunk_size=CHUNK_SIZE):
+    """
+    批量签名
+    :param messages: 字节串或文本字符串的可迭代对象
+    :param key: RSAPrivateKey
+    :param algorithm: 摘要算法名
+    :param workers: 进程数，None 时为 CPU 核数，1 时在当前进程中执行
+    :param chunk_size: 每个任务处理的消息数
+    :return: 签名列表，顺序与输入一致
+    """
+    return list(batch_map(sign_chunk, key, messages, algorithm, workers, chunk_size))
+
+
+def verify_many(messages, signatures, key, algorithm="sha256", workers=None, chunk_size=CHUNK_SIZE):
+    """
+    批量验签，只需要公钥
+    :param messages: 字节串或文本字符串的可迭代对象
+    :param signatures: 与 messages 一一对应的签名
+    :param key: RSAPublicKey 或 RSAPrivateKey
+    :return: 验签结果列表，顺序与输入一致
+    """
+    if hasattr(key, "public_key"):
+        key = key.public_key()
+    return list(batch_map(verify_chunk, key, zip(messages, signatures), algorithm, workers, chunk_size))
+
+
+def benchmark(key, count=2000, workers_list=(1, 2, 4), chunk_size=CHUNK_SIZE):
+    """
+    测量不同进程数下的签名与验签吞吐
+    :return: {进程数: (每秒签名数, 每秒验签数)}
+    """
+    messages = [b"message %d" % i for i in range(count)]
+    results = {}
+    for workers in workers_list:
+        start = time.perf_counter()
+        signatures = sign_many(messages, key, workers=workers, chunk_size=chunk_size)
+        sign_cost = time.perf_counter() - start
+        start = time.perf_counter()
+        ok = verify_many(messages, signatures, key, workers=workers, chunk_size=chunk_size)
+        verify_cost = time.perf_counter() - start
+        if not all(ok):
+            raise RuntimeError("验签失败")
+        results[workers] = (count / sign_cost, count / verify_cost)
+    return results
+
+
+if __name__ == '__main__':
+    private_key = generate_keypair(2048)
+    cpus = os.cpu_count() or 1
+    workers_list = sorted({1, 2, 4, cpus})
+    for w, (sign_rate, verify_rate) in benchmark(private_key, 2000, workers_list).items():
+        print("%2d 进程：签名 %8.1f 次/秒，验签 %9.1f 次/秒" % (w, sign_rate, verify_rate))
@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time    : 10/18/2026 20:40
+# @Author  : YLD10
+# @Email   : yl1315348050@yahoo.com
+# @File    : rsa_weakkeys.py
+# @Software: PyCharm
+"""
+批量 GCD 检测共享素因子的 RSA 模数
+
+对 N 个模数逐对求 GCD 需要 O(N^2) 次运算。这里使用 Bernstein 的批量 GCD：
+    1. 自底向上建立乘积树，根为所有模数之积 P；
+    2. 自顶向下建立余数树，每个节点为父节点的余数模本节点的平方，叶子得到 P mod n_i^2；
+    3. g_i = gcd(n_i, (P mod n_i^2) / n_i)，g_i > 1 说明 n_i 与其他某个模数共享素因子。
+总代价约为几次根节点规模的大数乘法与取模，接近线性。
+g_i == n_i 时 n_i 的两个素因子都与别的模数共享，再在这些少量模数之间两两求 GCD 分解。
+完全相同的模数在建树前去重，单独报告。
+
+树上的大数运算优先使用 gmpy2（GMP 的 FFT 乘法），没有安装时使用标准库 decimal：
+libmpdec 对超大数使用数论变换乘法和牛顿迭代除法，而 Python 整数的除法是平方复杂度，
+在根节点达到上千万位时比 decimal 慢一个数量级以上。
+
+模数文件每行一个模数，可在模数前加一个以空白分隔的标签，空行和 # 开头的行被忽略。
+用法：
+    python rsa_weakkeys.py moduli.txt --base 16 -o report.json
+"""
+import argparse
+import decimal
+import json
+import math
+import sys
+import time
+from contextlib import nullcontext
+
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
+
+if gmpy2 is not None:
+    BACKEND = "gmpy2"
+    big = gmpy2.mpz
+
+    def big_context():
+        return nullcontext()
+else:
+    BACKEND = "decimal"
+    big = decimal.Decimal
+    # 精度取最大值，整数运算不会舍入；一旦发生舍入立即报错
+    BIG_CONTEXT = decimal.Context(prec=decimal.MAX_PREC, Emax=decimal.MAX_EMAX, Emin=decimal.MIN_EMIN,
+                                  traps=[decimal.InvalidOperation, decimal.DivisionByZero,
+                                         decimal.Overflow, decimal.Inexact])
+
+    def big_context():
+        return decimal.localcontext(BIG_CONTEXT)
+
+
+def read_moduli(path, base=0):
+    """
+    流式读取模数文件
+    :param path: 文件路径，"-" 表示标准输入
+    :param base: 进制，0 表示按 int(s, 0) 的规则（0x 前缀为 16 进制，否则为 10 进制）
+    :return: (标签, 模数) 的生成器，没有标签时标签为行号
+    """
+    fp = sys.stdin if path == "-" else open(path, "r")
+    try:
+        for lineno, line in enumerate(fp, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            fields = line.split()
+            if len(fields) == 1:
+                label, value = str(lineno), fields[0]
+            elif len(fields) == 2:
+                label, value = fields
+            else:
+                raise ValueError("第 %d 行格式错误" % lineno)
+            try:
+                yield label, int(value, base)
+            except ValueError:
+                raise ValueError("第 %d 行不是合法的模数：%s" % (lineno, value))
+    finally:
+        if fp is not sys.stdin:
+            fp.close()
+
+
+def product_tree(moduli):
+    """
+    须在 big_context() 内调用
+    :param moduli: 模数列表
+    :return: 各层列表，第 0 层为模数本身，最后一层只有所有模数之积
+    """
+    levels = [[big(n) for n in moduli]]
+    while len(levels[-1]) > 1:
+        prev = levels[-1]
+        level = [prev[i] * prev[i + 1] for i in range(0, len(prev) - 1, 2)]
+        if len(prev) & 1:
+            level.append(prev[-1])
+        levels.append(level)
+    return levels
+
+
+def batch_gcd(moduli):
+    """
+    :param moduli: 互不相同的正整数模数列表，至少 2 个
+    :return: 列表，第 i 项为 gcd(n_i, 其余所有模数之积)
+    """
+    with big_context():
+        levels = product_tree(moduli)
+        rems = levels.pop()
+        # 逐层向下，用完的乘积树层立即释放
+        while levels:
+            level = levels.pop()
+            rems = [rems[i >> 1] % (n * n) for i, n in enumerate(level)]
+    # 叶子上的余数小于 n^2，转回 Python 整数计算：(P mod n^2) / n = (P / n) mod n
+    return [math.gcd(n, int(r) // n) for n, r in zip(moduli, rems)]
+
+
+def find_weak_keys(moduli):
+    """
+    找出共享素因子或完全重复的模数
+    :param moduli: 模数的可迭代对象，或 (标签, 模数) 的可迭代对象
+    :return: 报告列表，每项为字典：
+             {"label", "modulus", "reason": "shared_factor", "factor", "cofactor"}
+             或 {"label", "modulus", "reason": "duplicate", "duplicate_of"}
+             两个素因子都被共享、但无法从语料中分离时 factor 为 None
+    """
+    labels = []
+    unique = []
+    first_label = {}
+    report = []
+    for item in moduli:
+        if isinstance(item, tuple):
+            label, n = item
+        else:
+            label, n = str(len(labels) + len(report)), item
+        n = int(n)
+        if n in first_label:
+            report.append({"label": label, "modulus": n, "reason": "duplicate",
+                           "duplicate_of": first_label[n]})
+            continue
+        first_label[n] = label
+        labels.append(label)
+        unique.append(n)
+    # 被重复的那个模数同样已经泄露
+    duplicated = {}
+    for item in report:
+        duplicated.setdefault(item["duplicate_of"], item)
+    for label, item in duplicated.items():
+        report.append({"label": label, "modulus": item["modulus"], "reason": "duplicate",
+                       "duplicate_of": item["label"]})
+
+    if len(unique) < 2:
+        return report
+
+    gcds = batch_gcd(unique)
+    weak = [i for i, g in enumerate(gcds) if g > 1]
+    # g == n 的模数：在所有有问题的模数之间两两求 GCD，找出真因子
+    for i in weak:
+        n = unique[i]
+        g = gcds[i]
+        if g == n:
+            g = None
+            for j in weak:
+                if j != i:
+                    f = math.gcd(n, unique[j])
+                    if 1 < f < n:
+                        g = f
+                        break
+        report.append({"label": labels[i], "modulus": n, "reason": "shared_factor",
+                       "factor": g, "cofactor": None if g is None else n // g})
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量 GCD 检测共享素因子的 RSA 模数")
+    parser.add_argument("path", help="模数文件，- 表示标准输入")
+    parser.add_argument("--base", type=int, default=0, help="模数的进制，默认按 0x 前缀判断")
+    parser.add_argument("-o", "--output", help="报告保存路径（JSON）")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    moduli = list(read_moduli(args.path, args.base))
+    report = find_weak_keys(moduli)
+    cost = time.perf_counter() - start
+    for item in report:
+        if item["reason"] == "duplicate":
+            print("%s：与 %s 的模数相同" % (item["label"], item["duplicate_of"]))
+        elif item["factor"] is None:
+            print("%s：两个素因子都与其他模数共享" % item["label"])
+        else:
+            print("%s：共享素因子 %x" % (item["label"], item["factor"]))
+    print("共 %d 个模数，%d 个有问题，耗时 %.2f s（%s）" % (
+        len(moduli), len(report), cost, BACKEND))
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(report, fp, indent=2)
+    return 1 if report else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
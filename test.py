@@ -5,5 +5,632 @@
 # @Email   : yl1315348050@yahoo.com
 # @File    : test.py
 # @Software: PyCharm
+"""
+回归测试，运行：python -m unittest test
+"""
+import asyncio
+import hashlib
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import DES
+import RSA
+import crypto_service
+import envelope
+import factorize
+import prime
+import rsa_batch
+from RSA import string2bin
+
+MESSAGES = ["", "a", "1234567", "12345678", "123456789", "世界你好", "Hello, 世界！" * 7, "x" * 1000]
+
+
+def reference_encrypt(message, key):
+    """
+    按最初的二进制字符串流水线加密，作为整数引擎的对照
+    """
+    subkeys = DES.init_subkeys(string2bin(key))
+    enc_bin = DES.padding(string2bin(message))
+    re_bin = ""
+    for left in range(0, len(enc_bin), 64):
+        bin_str = enc_bin[left:left + 64]
+        re_bin += DES.final_displace(DES.encrypt_round(DES.init_displace(bin_str), subkeys))
+    return DES.bin2hexstring(re_bin)
+
+
+class DESTest(unittest.TestCase):
+    """
+    DES.encrypt/decrypt 的输出必须与最初的实现保持一致
+    """
+
+    def test_known_ciphertext(self):
+        self.assertEqual(DES.encrypt("世界你好", "12345678"), "256fd0dcdc713df76e7506094ede3cd7")
+        self.assertEqual(DES.decrypt("256fd0dcdc713df76e7506094ede3cd7", "12345678"), "世界你好")
+
+    def test_matches_string_engine(self):
+        for key in ("12345678", "abcdefgh"):
+            for message in MESSAGES:
+                self.assertEqual(DES.encrypt(message, key), reference_encrypt(message, key))
+
+    def test_round_trip(self):
+        for message in MESSAGES:
+            cipher = DES.encrypt(message, "12345678")
+            self.assertEqual(len(cipher), (len(message.encode("UTF-8")) // 8 + 1) * 16)
+            self.assertEqual(DES.decrypt(cipher, "12345678"), message)
+
+    def test_bytes_round_trip(self):
+        for n in range(18):
+            data = bytes(range(n))
+            cipher = DES.encrypt_bytes(data, b"12345678")
+            self.assertEqual(len(cipher), (n // 8 + 1) * 8)
+            self.assertEqual(DES.decrypt_bytes(cipher, b"12345678"), data)
+
+
+class TripleDESTest(unittest.TestCase):
+    """
+    标准 DES 与 3DES 的已知答案测试
+    """
+
+    def test_des_known_answer(self):
+        # NIST SP 800-17 变化明文测试的前几项，密钥为 0101010101010101
+        cipher = DES.StandardDESCipher("\x01" * 8)
+        vectors = [(0x8000000000000000, 0x95F8A5E5DD31D900), (0x4000000000000000, 0xDD7F121CA5015619),
+                   (0x2000000000000000, 0x2E8653104F3834EA), (0x1000000000000000, 0x4BD388FF6CD81D4F)]
+        for plain, expected in vectors:
+            self.assertEqual(cipher.encrypt_block(plain), expected)
+            self.assertEqual(cipher.decrypt_block(expected), plain)
+
+    def test_tdea_known_answer(self):
+        # 与 OpenSSL des-ede3 的结果对照
+        cipher = DES.TripleDES("12345678", "abcdefgh", "ABCDEFGH")
+        plain = int.from_bytes(b"Now is t", "big")
+        self.assertEqual(cipher.encrypt_block(plain), 0xDB6C9B6546905F45)
+        self.assertEqual(cipher.decrypt_block(0xDB6C9B6546905F45), plain)
+
+    def test_tdea_single_key_is_des(self):
+        cipher = DES.TripleDES("\x01" * 8, "\x01" * 8, "\x01" * 8)
+        self.assertEqual(cipher.encrypt_block(0x8000000000000000), 0x95F8A5E5DD31D900)
+
+    def test_two_key_round_trip(self):
+        cipher = DES.TripleDES("12345678", "87654321")
+        message = "世界你好" * 5
+        self.assertEqual(cipher.decrypt(cipher.encrypt(message)), message)
+
+    def test_bytes_keys(self):
+        # FIPS 46-3 的常用示例，密钥含非 ASCII 字节，只能以 bytes 给出
+        key = bytes.fromhex("133457799BBCDFF1")
+        cipher = DES.StandardDESCipher(key)
+        self.assertEqual(cipher.encrypt_block(0x0123456789ABCDEF), 0x85E813540F0AB405)
+        self.assertEqual(cipher.decrypt_block(0x85E813540F0AB405), 0x0123456789ABCDEF)
+        self.assertEqual(DES.TripleDES(key, key, key).encrypt_block(0x0123456789ABCDEF), 0x85E813540F0AB405)
+
+    def test_tdea_ecb_known_answer(self):
+        # NIST SP 800-67 附录中的 TDEA ECB 示例
+        cipher = DES.TripleDES(bytes.fromhex("0123456789ABCDEF"), bytes.fromhex("23456789ABCDEF01"),
+                               bytes.fromhex("456789ABCDEF0123"))
+        plain = b"The qufck brown fox jump"
+        expected = bytes.fromhex("A826FD8CE53B855F" "CCE21C8112256FE6" "68D5C05DD9B6B900")
+        self.assertEqual(cipher.ecb_encrypt(plain), expected)
+        self.assertEqual(cipher.ecb_decrypt(expected), plain)
+        data = "世界你好".encode("UTF-8") * 5
+        self.assertEqual(cipher.decrypt_bytes(cipher.encrypt_bytes(data)), data)
+
+
+def service_exchange(lines, max_request_bytes=crypto_service.MAX_REQUEST_BYTES):
+    """
+    在本机随机端口上启动加解密服务，通过一个连接依次发送 lines
+    :return: 收到的响应列表，按完成顺序排列
+    """
+    async def run():
+        service = crypto_service.CryptoService(workers=1, max_request_bytes=max_request_bytes)
+        await service.start()
+        server = await asyncio.start_server(service.handle_connection, "127.0.0.1", 0, limit=max_request_bytes)
+        try:
+            reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+            writer.write(b"".join(line + b"\n" for line in lines))
+            await writer.drain()
+            responses = [json.loads(await reader.readline()) for _ in lines]
+            # 半关闭后等服务端处理完并关闭连接，避免退出时取消仍在运行的连接协程
+            writer.write_eof()
+            await reader.read()
+            writer.close()
+            return responses
+        finally:
+            server.close()
+            await server.wait_closed()
+            await service.close()
+
+    return asyncio.run(run())
+
+
+class CryptoServiceTest(unittest.TestCase):
+    """
+    加解密服务对异常请求的处理：回复错误且不断开连接
+    """
+
+    def test_invalid_requests(self):
+        requests = [
+            b"{not json",
+            json.dumps({"id": 2, "op": "des_encrypt", "key": "12345678"}).encode(),
+            json.dumps({"id": 3, "op": "des_encrypt", "key": "12345678", "data": 123}).encode(),
+            json.dumps({"id": 4, "op": "des_encrypt", "data": "abc"}).encode(),
+            json.dumps({"id": 5, "op": "rsa_encrypt", "key": "101,3233", "data": "abc"}).encode(),
+            json.dumps({"id": 6, "op": "md5", "key": "12345678", "data": "abc"}).encode(),
+            json.dumps([1, 2, 3]).encode(),
+            json.dumps({"id": 7, "op": "des_encrypt", "key": "12345678", "data": "x" * 2000}).encode(),
+            json.dumps({"id": 1, "op": "des_encrypt", "key": "12345678", "data": "世界你好"}).encode(),
+        ]
+        responses = service_exchange(requests, max_request_bytes=1000)
+        errors = [r for r in responses if r["id"] is None]
+        self.assertEqual(len(errors), len(requests) - 1)
+        self.assertTrue(all("error" in r and "result" not in r for r in errors))
+        self.assertIn("请求超过 1000 字节", " ".join(r["error"] for r in errors))
+        ok = [r for r in responses if r["id"] == 1]
+        self.assertEqual(ok, [{"id": 1, "result": "256fd0dcdc713df76e7506094ede3cd7"}])
+
+    def test_rsa_request(self):
+        request = {"id": 1, "op": "rsa_encrypt", "key": [101, 3233], "data": "中文"}
+        response = service_exchange([json.dumps(request).encode()])[0]
+        self.assertEqual(response["id"], 1)
+        self.assertEqual(RSA.decrypt(response["result"], 1421, 3233), "中文")
+
+
+class RSATest(unittest.TestCase):
+    """
+    RSA 的模幂与 CRT 解密必须与最初的逐次相乘实现结果一致
+    """
+    # 课本上的小例子：p = 53，q = 61，n = 3233，e = 101，d = 1421
+    KEY = RSA.RSAPrivateKey(53, 61, 101, 1421)
+
+    @staticmethod
+    def reference_modexp(c, d, n):
+        """
+        最初 decrypt_inter 的逐次相乘实现，只用于小的 d
+        """
+        m = 1
+        for _ in range(d):
+            m = m * c % n
+        return m
+
+    def test_modexp_matches_reference(self):
+        for c in (0, 1, 2, 1234, 3232):
+            expected = self.reference_modexp(c, 1421, 3233)
+            self.assertEqual(RSA.decrypt_inter(c, 1421, 3233), expected)
+            self.assertEqual(RSA.decrypt_crt(c, 53, 61, self.KEY.dp, self.KEY.dq, self.KEY.qinv), expected)
+            self.assertEqual(self.KEY.decrypt_int(c), expected)
+
+    def test_decrypt_crt_matches_pow(self):
+        key = RSA.RSAPrivateKey(1000003, 1000033, 65537)
+        for c in (0, 1, 2, 1000003, 1000033, 123456789012, key.n - 1):
+            self.assertEqual(key.decrypt_int(c), pow(c, key.d, key.n))
+
+    def test_known_ciphertext(self):
+        # 最初实现的输出；"a" 解密后不能还原是原分段格式本身的问题，这里一并固定
+        vectors = [("a", "589001", "\x06\x01"), ("hello", "acfc3d653570", "hello"),
+                   ("中文", "500b8f79d02c14f", "中文")]
+        for message, cipher, plain in vectors:
+            self.assertEqual(RSA.encrypt(message, 101, 3233), cipher)
+            self.assertEqual(self.KEY.encrypt(message), cipher)
+            self.assertEqual(RSA.decrypt(cipher, 1421, 3233), plain)
+            self.assertEqual(self.KEY.decrypt(cipher), plain)
+
+    def test_repr_hides_primes(self):
+        self.assertNotIn("53", repr(self.KEY))
+        self.assertNotIn("1421", repr(self.KEY))
+
+
+class RSABlockTest(unittest.TestCase):
+    """
+    字节分组格式：0x01 标记字节 + 数据，密文分组为 n 的字节数
+    """
+    KEY = RSA.RSAPrivateKey(1000003, 1000033, 65537)
+
+    def round_trip(self, data):
+        cipher = RSA.encrypt_bytes(data, self.KEY.e, self.KEY.n)
+        self.assertEqual(self.KEY.encrypt_bytes(data), cipher)
+        self.assertEqual(RSA.decrypt_bytes(cipher, self.KEY.d, self.KEY.n), data)
+        self.assertEqual(self.KEY.decrypt_bytes(cipher), data)
+        return cipher
+
+    def test_leading_zero_bytes(self):
+        data_size = RSA.block_sizes(self.KEY.n)[0]
+        for data in (b"\x00", b"\x00" * data_size, b"\x00\x00\x01", b"\x00" * (data_size + 1) + b"abc"):
+            self.round_trip(data)
+
+    def test_empty_input(self):
+        self.assertEqual(self.round_trip(b""), b"")
+
+    def test_exactly_one_block(self):
+        data_size, block_size = RSA.block_sizes(self.KEY.n)
+        data = bytes(range(1, data_size + 1))
+        self.assertEqual(len(self.round_trip(data)), block_size)
+        self.assertEqual(len(self.round_trip(data + b"x")), 2 * block_size)
+
+    def test_stream_chunking(self):
+        data = bytes(range(256)) * 3
+        chunks = [data[i:i + 7] for i in range(0, len(data), 7)]
+        cipher = b"".join(self.KEY.encrypt_stream(chunks))
+        cipher_chunks = [cipher[i:i + 5] for i in range(0, len(cipher), 5)]
+        self.assertEqual(b"".join(self.KEY.decrypt_stream(cipher_chunks)), data)
+
+    def test_block_not_less_than_n(self):
+        block_size = RSA.block_sizes(self.KEY.n)[1]
+        for value in (self.KEY.n, 256 ** block_size - 1):
+            with self.assertRaisesRegex(ValueError, "不小于 n"):
+                self.KEY.decrypt_bytes(value.to_bytes(block_size, "big"))
+
+    def test_all_zero_block(self):
+        block_size = RSA.block_sizes(self.KEY.n)[1]
+        with self.assertRaisesRegex(ValueError, "密钥与密文不匹配"):
+            self.KEY.decrypt_bytes(b"\x00" * block_size)
+        with self.assertRaisesRegex(ValueError, "密钥与密文不匹配"):
+            RSA.decrypt_bytes(b"\x00" * block_size, self.KEY.d, self.KEY.n)
+
+    def test_truncated_cipher(self):
+        cipher = self.KEY.encrypt_bytes(b"hello")
+        with self.assertRaisesRegex(ValueError, "整数倍"):
+            self.KEY.decrypt_bytes(cipher[:-1])
+
+
+class RSASignatureTest(unittest.TestCase):
+    """
+    RSASSA-PKCS1-v1_5 签名与批量签名
+    """
+    # 两个已知素数，n 为 511 位，可以容纳 SHA-256 的签名编码
+    KEY = RSA.RSAPrivateKey(2 ** 255 - 19, 2 ** 256 - 189, 65537)
+
+    def test_emsa_known_answer(self):
+        digest = hashlib.sha256(b"abc").digest()
+        self.assertEqual(digest.hex(), "ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad")
+        expected = bytes.fromhex("0001" + "ff" * 10 + "00" + "3031300d060960864801650304020105000420" + digest.hex())
+        self.assertEqual(RSA.emsa_pkcs1_v15_encode(digest, "sha256", 64), expected)
+        with self.assertRaises(ValueError):
+            RSA.emsa_pkcs1_v15_encode(digest, "sha256", 61)
+        with self.assertRaises(ValueError):
+            RSA.emsa_pkcs1_v15_encode(digest[:-1], "sha256", 64)
+
+    def test_sign_matches_encoding(self):
+        encoded = RSA.emsa_pkcs1_v15_encode(hashlib.sha256(b"abc").digest(), "sha256", 64)
+        signature = self.KEY.sign(b"abc")
+        self.assertEqual(len(signature), 64)
+        self.assertEqual(int.from_bytes(signature, "big"), pow(int.from_bytes(encoded, "big"), self.KEY.d, self.KEY.n))
+
+    def test_verify_rejects_tampering(self):
+        public = self.KEY.public_key()
+        signature = self.KEY.sign("世界你好")
+        self.assertTrue(public.verify("世界你好", signature))
+        self.assertFalse(public.verify("世界你好!", signature))
+        self.assertFalse(public.verify("世界你好", signature[:-1] + bytes([signature[-1] ^ 1])))
+        self.assertFalse(public.verify("世界你好", signature[:-1]))
+        self.assertFalse(public.verify("世界你好", self.KEY.sign("世界你好", "sha1")))
+
+    def test_sign_many(self):
+        messages = [b"message %d" % i for i in range(20)]
+        expected = [self.KEY.sign(m) for m in messages]
+        for workers in (1, 2):
+            signatures = rsa_batch.sign_many(messages, self.KEY, workers=workers, chunk_size=3)
+            self.assertEqual(signatures, expected)
+        signatures = expected[:]
+        signatures[5] = signatures[6]
+        results = rsa_batch.verify_many(messages, signatures, self.KEY, workers=2, chunk_size=3)
+        self.assertEqual(results, [i != 5 for i in range(20)])
+
+
+class FileSignatureTest(unittest.TestCase):
+    """
+    流式文件签名：分块读取与内存映射读取的结果相同，改动文件或签名后验签失败
+    """
+    KEY = RSASignatureTest.KEY
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        with os.fdopen(fd, "wb") as fp:
+            fp.write(os.urandom(300000))
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_chunked_and_mmap(self):
+        with open(self.path, "rb") as fp:
+            expected = hashlib.sha256(fp.read()).digest()
+        self.assertEqual(RSA.hash_file(self.path, chunk_size=4096), expected)
+        self.assertEqual(RSA.hash_file(self.path, use_mmap=True), expected)
+        signature = RSA.sign_file(self.path, self.KEY)
+        self.assertEqual(signature, RSA.sign_file(self.path, self.KEY, use_mmap=True))
+        self.assertTrue(RSA.verify_file(self.path, signature, self.KEY.public_key(), use_mmap=True))
+
+    def test_empty_file(self):
+        with open(self.path, "wb"):
+            pass
+        signature = RSA.sign_file(self.path, self.KEY, use_mmap=True)
+        self.assertTrue(RSA.verify_file(self.path, signature, self.KEY))
+
+    def test_rejects_tampering(self):
+        signature = RSA.sign_file(self.path, self.KEY)
+        self.assertTrue(RSA.verify_file(self.path, signature, self.KEY))
+        flipped = signature[:10] + bytes([signature[10] ^ 0x80]) + signature[11:]
+        self.assertFalse(RSA.verify_file(self.path, flipped, self.KEY))
+        with open(self.path, "r+b") as fp:
+            fp.seek(123456)
+            byte = fp.read(1)
+            fp.seek(123456)
+            fp.write(bytes([byte[0] ^ 1]))
+        for use_mmap in (False, True):
+            self.assertFalse(RSA.verify_file(self.path, signature, self.KEY, use_mmap=use_mmap))
+
+
+class EnvelopeTest(unittest.TestCase):
+    """
+    数字信封：任何部分被改动都必须在解密之前被发现
+    """
+    KEY = RSASignatureTest.KEY
+    DATA = "世界你好".encode("UTF-8") * 1000
+
+    def tampered(self, env):
+        """
+        :return: [(说明, 改动后的信封), ...]，分别改动信封头、加密的会话密钥、密文和校验值
+        """
+        key_len = envelope.HEADER.unpack_from(env)[2]
+        body = envelope.HEADER.size + key_len
+        cases = [("magic", 0), ("iv", 8), ("data_len", envelope.HEADER.size - 1), ("wrapped", envelope.HEADER.size + 3),
+                 ("data", body + 100), ("mac", len(env) - 1)]
+        return [(name, env[:i] + bytes([env[i] ^ 1]) + env[i + 1:]) for name, i in cases]
+
+    def test_round_trip(self):
+        env = envelope.seal(self.DATA, self.KEY.public_key())
+        self.assertEqual(envelope.open_envelope(env, self.KEY), self.DATA)
+        self.assertEqual(envelope.open_envelope(envelope.seal(b"", self.KEY), self.KEY), b"")
+
+    def test_tamper_detected_before_decrypt(self):
+        env = envelope.seal(self.DATA, self.KEY)
+        with mock.patch.object(envelope, "ctr_xor", wraps=envelope.ctr_xor) as ctr_xor:
+            for name, bad in self.tampered(env) + [("truncated", env[:-1])]:
+                with self.subTest(name):
+                    with self.assertRaises(ValueError):
+                        envelope.open_envelope(bad, self.KEY)
+            ctr_xor.assert_not_called()
+
+    def test_file_tamper_leaves_no_output(self):
+        env = envelope.seal(self.DATA, self.KEY)
+        with tempfile.TemporaryDirectory() as tmp:
+            src, dst = os.path.join(tmp, "env"), os.path.join(tmp, "out")
+            for name, bad in self.tampered(env):
+                with self.subTest(name):
+                    with open(src, "wb") as fp:
+                        fp.write(bad)
+                    with self.assertRaises(ValueError):
+                        envelope.open_file(src, dst, self.KEY, chunk_size=1000)
+                    self.assertFalse(os.path.exists(dst))
+            with open(src, "wb") as fp:
+                fp.write(env)
+            envelope.open_file(src, dst, self.KEY, chunk_size=1000)
+            with open(dst, "rb") as fp:
+                self.assertEqual(fp.read(), self.DATA)
+
+
+class MultiPrimeTest(unittest.TestCase):
+    """
+    多素数私钥的 Garner 合并结果必须等于 c^d mod n
+    """
+    PRIMES = [2 ** 61 - 1, 2 ** 89 - 1, 2 ** 107 - 1, 2 ** 127 - 1]
+
+    def test_garner_matches_pow(self):
+        for count in (2, 3, 4):
+            key = RSA.RSAMultiPrimeKey(self.PRIMES[:count], 65537)
+            values = [0, 1, 2, self.PRIMES[0], self.PRIMES[count - 1] + 1, key.n - 1, key.n // 3]
+            for c in values:
+                self.assertEqual(key.decrypt_int(c), pow(c, key.d, key.n))
+            data = bytes(range(256))
+            self.assertEqual(key.decrypt_bytes(key.encrypt_bytes(data)), data)
+
+    def test_two_primes_match_crt(self):
+        key = RSA.RSAMultiPrimeKey(self.PRIMES[:2], 65537)
+        two = RSA.RSAPrivateKey(self.PRIMES[0], self.PRIMES[1], 65537)
+        self.assertEqual(key.d, two.d)
+        for c in (2, 12345678901234567890, key.n - 2):
+            self.assertEqual(key.decrypt_int(c), two.decrypt_int(c))
+
+    def test_repr_hides_primes(self):
+        key = RSA.RSAMultiPrimeKey(self.PRIMES[:3], 65537)
+        self.assertNotIn(str(self.PRIMES[0]), repr(key))
+
+
+class InverseTest(unittest.TestCase):
+    """
+    迭代扩展欧几里得与批量求逆
+    """
+
+    def test_ex_gcd(self):
+        for a, b in ((240, 46), (46, 240), (17, 0), (0, 17), (2 ** 127 - 1, 2 ** 89 - 1), (12, 18)):
+            gcd, x, y = RSA.ex_gcd(a, b)
+            self.assertEqual(a * x + b * y, gcd)
+        # 连续的斐波那契数使迭代次数最多，递归实现会超过递归深度
+        a, b = 1, 1
+        for _ in range(3000):
+            a, b = b, a + b
+        self.assertEqual(RSA.ex_gcd(b, a)[0], 1)
+
+    def test_mod_inverse_edges(self):
+        self.assertEqual(RSA.mod_inverse(1, 3120), 1)
+        self.assertEqual(RSA.mod_inverse(3121, 3120), 1)
+        self.assertEqual(RSA.mod_inverse(101, 3120), 1421)
+        self.assertEqual(RSA.mod_inverse(-1, 3120), 3119)
+        for a in (0, 2, 3120, 65):
+            with self.assertRaises(ValueError):
+                RSA.mod_inverse(a, 3120)
+
+    def test_batch_inverse(self):
+        m = 2 ** 127 - 1
+        values = [1, 2, 3, m - 1, 12345678901234567890, m + 5]
+        self.assertEqual(RSA.batch_inverse(values, m), [RSA.mod_inverse(v, m) for v in values])
+        self.assertEqual(RSA.batch_inverse(iter([7]), 3120), [RSA.mod_inverse(7, 3120)])
+        self.assertEqual(RSA.batch_inverse([], m), [])
+        with self.assertRaises(ValueError):
+            RSA.batch_inverse([7, 6, 11], 3120)
+
+
+class SieveTest(unittest.TestCase):
+    """
+    分段筛与素数计数
+    """
+
+    def test_primes_in_range_across_segments(self):
+        # 每段只有 7 个奇数，区间跨过很多段边界
+        for lo, hi in ((0, 2000), (2, 3), (3, 4), (1000, 1100), (999983, 1000100), (10 ** 9, 10 ** 9 + 500)):
+            expected = [v for v in range(lo, hi) if prime.isprime(v)]
+            self.assertEqual(list(prime.primes_in_range(lo, hi, segment_bytes=7)), expected)
+            self.assertEqual(list(prime.primes_in_range(lo, hi)), expected)
+        self.assertEqual(list(prime.primes_in_range(10, 10)), [])
+        self.assertEqual(list(prime.primes_in_range(-5, 3)), [2])
+
+    def test_prime_count(self):
+        self.assertEqual(prime.prime_count(10 ** 6), 78498)
+        self.assertEqual(prime.prime_count(10 ** 8), 5761455)
+        for num in (0, 1, 2, 3, 4, 100, 7919, 7920):
+            self.assertEqual(prime.prime_count(num), len(list(prime.primes_in_range(0, num + 1))))
+
+    def test_prime_count_without_numpy(self):
+        with mock.patch.object(prime, "np", None):
+            self.assertEqual(prime.prime_count(10 ** 6), 78498)
+            self.assertEqual(prime.prime_count(7919), 1000)
+
+
+class BatchPrimalityTest(unittest.TestCase):
+    """
+    isprime_many、isprime_fast 与 isprime 的结果一致
+    """
+    # 强伪素数与 Carmichael 数
+    PSEUDOPRIMES = [561, 1105, 1729, 2047, 3215031751, 3825123056546413051, 318665857834031151167461]
+
+    def test_matches_isprime(self):
+        values = list(range(-10, 70000)) + list(range(10 ** 12, 10 ** 12 + 300))
+        expected = [prime.isprime(v) for v in values]
+        self.assertEqual(prime.isprime_many(values), expected)
+        self.assertEqual([prime.isprime_fast(v) for v in values], expected)
+        # 对这些数做试除太慢，它们都是合数
+        self.assertEqual(prime.isprime_many(self.PSEUDOPRIMES), [False] * len(self.PSEUDOPRIMES))
+        self.assertEqual(prime.isprime_many(["7", 7.0, None, 7]), [False, False, False, True])
+
+    def test_large_values(self):
+        self.assertEqual(prime.isprime_many([2 ** 61 - 1, 2 ** 127 - 1, (2 ** 61 - 1) * (2 ** 89 - 1), 2 ** 64 + 13]),
+                         [True, True, False, True])
+
+    @unittest.skipIf(prime.np is None, "未安装 NumPy")
+    def test_numpy_array(self):
+        np = prime.np
+        values = np.arange(-10, 69990, dtype=np.int64).reshape(20, -1)
+        expected = np.array([prime.isprime(int(v)) for v in values.ravel()]).reshape(values.shape)
+        self.assertTrue((prime.isprime_many(values) == expected).all())
+        big = np.array(self.PSEUDOPRIMES[:-1] + [2 ** 61 - 1], dtype=np.uint64)
+        self.assertEqual(prime.isprime_many(big).tolist(), [False] * 6 + [True])
+        self.assertFalse(prime.isprime_many(np.array([7.0])).any())
+
+
+class PrimeBitmapTest(unittest.TestCase):
+    """
+    素数位图的查表结果与 isprime 一致，段边界处也不例外
+    """
+    LIMIT = 50001
+
+    def setUp(self):
+        self.expected = [prime.isprime(v) for v in range(self.LIMIT)]
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "primes.bin")
+        # 每段 24 个奇数，段边界不在整字节的 64 位上对齐
+        prime.write_bitmap(self.path, self.LIMIT, segment_bytes=24)
+
+    def tearDown(self):
+        prime.unload_bitmap()
+        self.tmp.cleanup()
+
+    def test_lookup(self):
+        with prime.PrimeBitmap(self.path) as bitmap:
+            self.assertEqual(bitmap.limit, self.LIMIT)
+            self.assertEqual([bitmap.isprime(v) for v in range(self.LIMIT)], self.expected)
+            if prime.np is not None:
+                values = prime.np.arange(self.LIMIT)
+                self.assertEqual(bitmap.isprime_array(values).tolist(), self.expected)
+
+    def test_loaded_bitmap(self):
+        prime.load_bitmap(self.path)
+        values = list(range(self.LIMIT + 100))
+        expected = self.expected + [prime.isprime_fast(v) for v in range(self.LIMIT, self.LIMIT + 100)]
+        self.assertEqual([prime.isprime(v) for v in values], expected)
+        self.assertEqual(prime.isprime_many(values), expected)
+        if prime.np is not None:
+            self.assertEqual(prime.isprime_many(prime.np.array(values)).tolist(), expected)
+
+    def test_bad_file(self):
+        with open(self.path, "r+b") as fp:
+            fp.truncate(100)
+        with self.assertRaises(ValueError):
+            prime.PrimeBitmap(self.path)
+        # 环境变量指向损坏的文件时导入照常成功，只给出警告
+        env = dict(os.environ, PRIME_BITMAP=self.path)
+        result = subprocess.run([sys.executable, "-c", "import prime; print(prime.isprime(97))"], env=env,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(result.stdout.strip(), "True")
+        self.assertIn("RuntimeWarning", result.stderr)
+
+
+class FactorizeTest(unittest.TestCase):
+    """
+    整数分解
+    """
+
+    def check(self, num, factors):
+        result = factorize.factorize(num)
+        self.assertEqual(result, factors)
+        self.assertEqual(list(result), sorted(result))
+
+    def test_small(self):
+        self.check(1, {})
+        self.check(2, {2: 1})
+        self.check(12, {2: 2, 3: 1})
+        self.check(3233, {53: 1, 61: 1})
+        self.check(16383 * 16381, {3: 1, 43: 1, 127: 1, 16381: 1})
+        for num in range(2, 3000):
+            result = factorize.factorize(num)
+            self.assertTrue(all(prime.isprime(p) for p in result))
+            self.assertEqual(math.prod(p ** e for p, e in result.items()), num)
+        with self.assertRaises(ValueError):
+            factorize.factorize(0)
+
+    def test_perfect_powers(self):
+        self.check(3 ** 20, {3: 20})
+        self.check(2 ** 10 * 7 ** 5, {2: 10, 7: 5})
+        self.check(1000003 ** 4, {1000003: 4})
+        self.check((2 ** 31 - 1) ** 2 * (2 ** 61 - 1) ** 3, {2 ** 31 - 1: 2, 2 ** 61 - 1: 3})
+        self.assertEqual(factorize.perfect_power(1000003 ** 4), (1000003, 4))
+        self.assertEqual(factorize.perfect_power(1000003 * 1000033), (1000003 * 1000033, 1))
+
+    def test_semiprime(self):
+        # 64 位的两个 32 位素数之积
+        self.check((2 ** 31 - 1) * 4294967291, {2 ** 31 - 1: 1, 4294967291: 1})
+        self.check(2 ** 61 - 1, {2 ** 61 - 1: 1})
+
+    def test_timeout_partial(self):
+        hard = (2 ** 89 - 1) * (2 ** 107 - 1)
+        with self.assertRaises(factorize.FactorTimeout) as ctx:
+            factorize.factorize(2 * 3 ** 2 * hard, timeout=0.2)
+        self.assertEqual(ctx.exception.composites, [hard])
+        self.assertEqual(ctx.exception.factors, {2: 1, 3: 2, hard: 1})
+
+    def test_factorize_many(self):
+        hard = (2 ** 89 - 1) * (2 ** 107 - 1)
+        results = factorize.factorize_many([12, hard, 3233], timeout=0.2, workers=2)
+        self.assertEqual(results[0], {2: 2, 3: 1})
+        self.assertIsInstance(results[1], factorize.FactorTimeout)
+        self.assertEqual(results[1].composites, [hard])
+        self.assertEqual(results[2], {53: 1, 61: 1})
+
+
 if __name__ == '__main__':
-    pass
+    unittest.main()